@@ -0,0 +1,114 @@
+"""articles.json split into one file per institution, for the site to load a department at a time.
+
+writeShards() takes the entries of articles.json grouped by institution
+(as AuthorInfoSink.articles() yields them when it shards) and writes
+each institution's as a JSON list of its own, named after the
+institution, in the order and layout of articles.json (see
+jsonstream.py), with a gzipped copy next to it if asked (for a web
+server to send as is, e.g. nginx's gzip_static). manifest.json in the
+same directory maps each institution to its shard: the file, how many
+articles it holds, its size (and its gzipped size) and the SHA-1 of
+its contents.
+
+A shard is only written when its contents differ from those the
+manifest lists (or its files are missing), and the shards of
+institutions that are gone are removed, so after a refresh only the
+shards that changed are new, and copying the directory to the web
+server only sends those. The manifest is written last, so it never
+lists a shard that is not there yet.
+"""
+import cStringIO
+import hashlib
+import itertools
+import json
+import os
+import re
+import unicodedata
+from jsonstream import GzipOutput, JSONListWriter
+
+manifestName = 'manifest.json'
+
+
+def slug(institution):
+    """A file name for an institution: lower case ASCII letters, digits and dashes."""
+    ascii = unicodedata.normalize('NFKD', unicode(institution)).encode('ascii', 'ignore')
+    return re.sub('[^a-z0-9]+', '-', ascii.lower()).strip('-') or 'institution'
+
+
+def readManifest(dirname):
+    """The shards listed in dirname's manifest, by institution (none if it has none)."""
+    try:
+        with open(os.path.join(dirname, manifestName)) as f:
+            return json.load(f)['shards']
+    except (IOError, ValueError, KeyError):
+        return {}
+
+
+def replace(fname, text, compressed):
+    """Writes text to fname (and gzipped to fname.gz), each all at once; returns the gzipped size."""
+    with open(fname + '.tmp', 'wb') as f:
+        f.write(text)
+    os.rename(fname + '.tmp', fname)
+    if not compressed:
+        return None
+    f = GzipOutput(fname + '.gz.tmp', os.path.basename(fname), 6)
+    try:
+        f.write(text)
+    finally:
+        f.close()
+    os.rename(fname + '.gz.tmp', fname + '.gz')
+    return os.path.getsize(fname + '.gz')
+
+
+def writeShards(dirname, articles, compact=False, compressed=False):
+    """Writes the articles, grouped by institution, as shards in dirname; returns how many shards were written, left as they were and removed."""
+    if not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    old = readManifest(dirname)
+    shards = {}
+    names = set()
+    written = 0
+    for (institution, group) in itertools.groupby(articles, lambda a: a['institution']):
+        if institution in shards:
+            raise ValueError('articles of %s are not together' % institution.encode('utf-8'))
+        name = slug(institution)
+        n = 2
+        while name in names:
+            name = '%s-%d' % (slug(institution), n)
+            n += 1
+        names.add(name)
+        # One institution's shard is small enough to hash before it is written.
+        buf = cStringIO.StringIO()
+        writer = JSONListWriter(buf, compact)
+        writer.writeAll(group)
+        writer.close()
+        text = buf.getvalue()
+        shard = {'file': name + '.json', 'articles': writer.count, 'bytes': len(text),
+                 'sha1': hashlib.sha1(text).hexdigest()}
+        files = [shard['file']] + ([shard['file'] + '.gz'] if compressed else [])
+        previous = old.get(institution, {})
+        if (previous.get('file') == shard['file'] and previous.get('sha1') == shard['sha1'] and
+                (not compressed or 'gzipBytes' in previous) and
+                all(os.path.exists(os.path.join(dirname, f)) for f in files)):
+            if compressed:
+                shard['gzipBytes'] = previous['gzipBytes']
+        else:
+            gzipBytes = replace(os.path.join(dirname, shard['file']), text, compressed)
+            if compressed:
+                shard['gzipBytes'] = gzipBytes
+            written += 1
+        shards[institution] = shard
+    # Remove the files no shard uses any more.
+    kept = set(f for s in shards.values() for f in (s['file'], s['file'] + '.gz') if f != s['file'] + '.gz' or compressed)
+    for s in old.values():
+        for f in (s['file'], s['file'] + '.gz'):
+            if f not in kept and os.path.exists(os.path.join(dirname, f)):
+                os.remove(os.path.join(dirname, f))
+    removed = len([i for i in old if i not in shards])
+    fname = os.path.join(dirname, manifestName)
+    with open(fname + '.tmp', 'w') as f:
+        json.dump({'compact': compact, 'compressed': compressed, 'shards': shards}, f,
+                  indent=2, separators=(',', ': '), sort_keys=True)
+        f.write('\n')
+    os.rename(fname + '.tmp', fname)
+    return (written, len(shards) - written, removed)
@@ -0,0 +1,198 @@
+# Benchmarks each way of rebuilding the generated files from DBLP, on
+# synthetic dumps (see dblpsynth.py) of 1, 2 and 4 times a base size,
+# so that a slowdown, or a mode that does not scale, shows up before
+# the real dump gets there.
+#
+# usage: python util/bench-ingest.py [--records N] [--scales 1,2,4] [--mode NAME ...] [--report FILE]
+#
+# Every mode runs regenerate-data.py (or, for the parse-only modes,
+# bench-parse.py) in a process of its own, in a work directory holding
+# the dumps and copies of faculty-affiliations.csv and dblp-aliases.csv.
+# regenerate-data.py runs with --profile, and its report gives the
+# records and bytes per second, the time in each phase and the peak
+# memory use. The dumps only depend on --seed and their size, so the
+# reports of two commits run with the same ones compare like with like
+# (each report lists the commit and the checksums of its dumps).
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import time
+from dblpsynth import writeDump
+
+here = os.path.dirname(os.path.abspath(__file__))
+root = os.path.join(here, '..')
+
+
+def script(name):
+    return [sys.executable, os.path.join(here, name)]
+
+
+def run(cmd, cwd):
+    """Runs a command with its output discarded, returning how long it took."""
+    start = time.time()
+    with open(os.devnull, 'w') as devnull:
+        subprocess.check_call(cmd, cwd=cwd, stdout=devnull)
+    return time.time() - start
+
+
+def md5(fname):
+    h = hashlib.md5()
+    with open(fname, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), ''):
+            h.update(block)
+    return h.hexdigest()
+
+
+# Each mode prepares what it needs (untimed, or timed separately as
+# its setup) and returns the arguments of the timed run.
+
+def serial(bench, dump):
+    return []
+
+
+def parallel(bench, dump):
+    return ['--jobs', str(bench.jobs)]
+
+
+def prefilter(bench, dump):
+    return ['--prefilter']
+
+
+def refresh(bench, dump):
+    # Every output at once, as in make refresh.
+    return ['--coauthors', '--all-pubs', '--aliases', 'aliases.txt', '--missing-authors', 'missing.txt']
+
+
+def store(bench, dump):
+    bench.setup(script('make-pubstore.py') + [dump, dump + '.store'])
+    return ['--input', dump + '.store']
+
+
+def index(bench, dump):
+    indexed = dump.replace('.xml.gz', '-indexed.xml.gz')
+    bench.setup(script('index-dblp.py') + [dump, indexed])
+    return ['--input', indexed]
+
+
+def incremental(bench, dump):
+    # The next dump, with 1% of its papers revised, after a run on this one.
+    (seed, records) = bench.dumps[dump]
+    changed = dump.replace('.xml.gz', '-next.xml.gz')
+    writeDump(os.path.join(bench.work, changed), records, seed, changed=0.01)
+    state = dump + '.state'
+    shutil.rmtree(os.path.join(bench.work, state), ignore_errors=True)
+    bench.setup(script('regenerate-data.py') + ['--input', dump, '--incremental', state])
+    return ['--input', changed, '--incremental', state]
+
+
+modes = [('serial', serial), ('parallel', parallel), ('prefilter', prefilter), ('refresh', refresh),
+         ('store', store), ('index', index), ('incremental', incremental)]
+engines = ('iterparse', 'target')
+
+
+class Bench(object):
+    """The dumps and runs of one benchmark."""
+
+    def __init__(self, work, jobs):
+        self.work = work
+        self.jobs = jobs
+        # Dump -> (seed, records).
+        self.dumps = {}
+        self.setupSeconds = 0.0
+
+    def dump(self, seed, records):
+        """The name of the synthetic dump for seed and size, writing it if it is not there yet."""
+        name = 'dblp-s%d-n%d.xml.gz' % (seed, records)
+        path = os.path.join(self.work, name)
+        if not os.path.exists(path):
+            partial = os.path.join(self.work, 'partial-' + name)
+            writeDump(partial, records, seed)
+            os.rename(partial, path)
+        self.dumps[name] = (seed, records)
+        return name
+
+    def setup(self, cmd):
+        self.setupSeconds += run(cmd, self.work)
+
+    def regenerate(self, mode, prepare, dump):
+        self.setupSeconds = 0.0
+        args = prepare(self, dump)
+        profile = 'profile-%s.json' % mode
+        seconds = run(script('regenerate-data.py') + ['--input', dump] + args +
+                      ['--profile', profile, '--profile-interval', '0'], self.work)
+        with open(os.path.join(self.work, profile)) as f:
+            report = json.load(f)
+        # Per-venue and per-rule counts do not belong in a benchmark.
+        report.pop('venues', None)
+        report.pop('rules', None)
+        # Throughput is in records of the dump, whether or not the mode
+        # parsed them all.
+        records = self.dumps[dump][1]
+        return {'seconds': seconds, 'setupSeconds': self.setupSeconds, 'records': records,
+                'parsed': report['records'], 'recordsPerSecond': records / seconds,
+                'peakRSS': max(report['peakRSS'].values()), 'profile': report}
+
+    def parse(self, engine, dump):
+        seconds = run(script('bench-parse.py') + [dump, '--engine', engine], self.work)
+        records = self.dumps[dump][1]
+        return {'seconds': seconds, 'records': records, 'recordsPerSecond': records / seconds}
+
+
+def commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=here).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+parser = argparse.ArgumentParser(description='Time each way of rebuilding the generated files at several sizes of a synthetic DBLP.')
+parser.add_argument('--records', type=int, default=50000, metavar='N', help='records in the 1x dump (default: 50000)')
+parser.add_argument('--scales', default='1,2,4', help='sizes to run, as multiples of --records (default: 1,2,4)')
+parser.add_argument('--seed', type=int, default=0, help='random seed of the dumps (default: 0)')
+parser.add_argument('--mode', action='append', choices=[m for (m, _) in modes] + ['parse-' + e for e in engines],
+                    help='mode to time (default: all)')
+parser.add_argument('--jobs', type=int, default=multiprocessing.cpu_count(), metavar='N', help='workers for the parallel mode (default: one per CPU)')
+parser.add_argument('--work', default='bench-ingest', metavar='DIR', help='directory for the dumps and outputs, reused between runs (default: bench-ingest)')
+parser.add_argument('--report', default='bench-ingest.json', metavar='FILE', help='JSON report to write (default: bench-ingest.json)')
+args = parser.parse_args()
+
+if not os.path.isdir(args.work):
+    os.makedirs(args.work)
+for f in ('faculty-affiliations.csv', 'dblp-aliases.csv'):
+    shutil.copy(os.path.join(root, f), args.work)
+bench = Bench(args.work, args.jobs)
+selected = args.mode or [m for (m, _) in modes] + ['parse-' + e for e in engines]
+scales = [int(s) for s in args.scales.split(',')]
+results = []
+print "%5s %-16s %9s %8s %10s %8s %8s %9s" % ('scale', 'mode', 'records', 'seconds', 'records/s', 'MB/s', 'RSS MB', 'vs 1x')
+for scale in scales:
+    dump = bench.dump(args.seed, args.records * scale)
+    for (mode, prepare) in modes:
+        if mode in selected:
+            results.append(dict(bench.regenerate(mode, prepare, dump), mode=mode, scale=scale, dump=dump))
+    for e in engines:
+        if 'parse-' + e in selected:
+            results.append(dict(bench.parse(e, dump), mode='parse-' + e, scale=scale, dump=dump))
+    for r in results:
+        if r['scale'] != scale:
+            continue
+        base = [b for b in results if b['mode'] == r['mode'] and b['scale'] == scales[0]][0]
+        # How much longer than the smallest size, per record (1.0 scales linearly).
+        r['scaling'] = (r['seconds'] / r['records']) / (base['seconds'] / base['records'])
+        profile = r.get('profile')
+        print "%4dx %-16s %9d %8.2f %10.0f %8s %8s %9.2f" % (
+            scale, r['mode'], r['records'], r['seconds'], r['recordsPerSecond'],
+            '%.1f' % (profile['bytesPerSecond']['decompressed'] / 1e6) if profile else '-',
+            r['peakRSS'] >> 20 if 'peakRSS' in r else '-', r['scaling'])
+
+with open(args.report, 'w') as f:
+    json.dump({'commit': commit(), 'seed': args.seed, 'records': args.records, 'scales': scales, 'jobs': args.jobs,
+               'dumps': dict((d, md5(os.path.join(args.work, d))) for d in sorted(bench.dumps)),
+               'results': results}, f, indent=2, sort_keys=True)
+    f.write('\n')
+print "Report written to %s." % args.report
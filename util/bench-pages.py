@@ -0,0 +1,79 @@
+# Compares the speed of the ways of parsing DBLP's pages fields, on
+# the pages values of a dump (so on their real distribution).
+#
+# usage: python util/bench-pages.py [dblp.xml.gz] [--repeat N]
+#
+# "regexes" is the parse the scripts used to do (one regular
+# expression for each form of page range, run once for the first page
+# and again for the page count); "spans" is pagerange.spans, which
+# gives both the real and the legacy span in one match, and
+# "parsePages" adds its memo cache, starting out empty. It first checks
+# that the legacy spans are what the old regexes give on every value,
+# since those decide which papers count, and exits with an error if
+# not. The dump is read a chunk at a time.
+import argparse
+import pagerange
+import re
+import sys
+import time
+from dblpscan import chunks, openDBLP
+
+pagesElement = re.compile(r'<pages>([^<]*)</pages>')
+pageCounterNormal = re.compile('(\d+)-(\d+)')
+pageCounterColon = re.compile('[0-9]+:([1-9][0-9]*)-[0-9]+:([1-9][0-9]*)')
+
+
+def regexes(pageStr):
+    # The first page,
+    normal = pageCounterNormal.match(pageStr)
+    colon = pageCounterColon.match(pageStr)
+    m = normal or colon
+    start = int(m.group(1)) if m else 0
+    # and, all over again, the page count.
+    normal = pageCounterNormal.match(pageStr)
+    colon = pageCounterColon.match(pageStr)
+    m = normal or colon
+    count = int(m.group(2)) - int(m.group(1)) + 1 if m else 0
+    return (start, count)
+
+
+ways = (('regexes', regexes), ('spans', pagerange.spans), ('parsePages', pagerange.parsePages))
+
+parser = argparse.ArgumentParser(description='Time each way of parsing the pages fields of a DBLP dump.')
+parser.add_argument('input', nargs='?', default='dblp.xml.gz', help='DBLP dump to read (default: dblp.xml.gz)')
+parser.add_argument('--repeat', type=int, default=3, metavar='N', help='report the best of N runs (default: 3)')
+args = parser.parse_args()
+
+# Every value in dump order, each distinct one held only once.
+values = []
+distinct = {}
+with openDBLP(args.input) as f:
+    for piece in chunks(f)[1]:
+        values.extend(distinct.setdefault(v, v) for v in pagesElement.findall(piece))
+print "%d pages values, %d distinct." % (len(values), len(distinct))
+forms = {}
+for v in values:
+    form = re.sub('[ivxlcdm]+', 'R', re.sub('[0-9]+', 'N', v), flags=re.IGNORECASE)
+    forms[form] = forms.get(form, 0) + 1
+for (form, n) in sorted(forms.items(), key=lambda (form, n): -n)[:10]:
+    print "  %-20s %5.1f%%" % (form, 100.0 * n / len(values))
+
+differ = sorted(v for v in distinct if pagerange.spans(v)[1] != regexes(v))
+for v in differ[:10]:
+    print "  %r: the legacy span is %r, the regexes give %r" % (v, pagerange.spans(v)[1], regexes(v))
+if differ:
+    sys.exit("%d distinct pages values parse differently." % len(differ))
+print "The legacy spans agree with the regexes on every value;",
+print "%d distinct values have a real span they did not read." % sum(
+    1 for v in distinct if pagerange.spans(v)[0] != pagerange.spans(v)[1])
+
+for (name, way) in ways:
+    best = None
+    for _ in range(args.repeat):
+        pagerange.cache.clear()
+        start = time.time()
+        for v in values:
+            way(v)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print "%s: %.2fs, %.0f values/sec" % (name, best, len(values) / best)
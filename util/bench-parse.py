@@ -0,0 +1,42 @@
+# Compares the speed of the ways of parsing the DBLP dump into records.
+#
+# usage: python util/bench-parse.py [dblp.xml.gz] [--engine NAME ...]
+#
+# "xmltodict" is the dict-per-record parse the scripts used to do (it
+# is only run if xmltodict is installed); the others are the engines
+# in dblpscan.engines.
+import argparse
+import time
+from dblpscan import engines, openDBLP, recordTags
+
+
+def xmltodictRecords(f):
+    import xmltodict
+    found = []
+
+    def handle(path, item):
+        if path[-1][0] in recordTags:
+            found.append(item)
+        return True
+    xmltodict.parse(f, item_depth=2, item_callback=handle)
+    return found
+
+
+allEngines = dict(engines)
+allEngines['xmltodict'] = xmltodictRecords
+
+parser = argparse.ArgumentParser(description='Time each DBLP parser on a dump, in records per second.')
+parser.add_argument('input', nargs='?', default='dblp.xml.gz', help='DBLP dump to read (default: dblp.xml.gz)')
+parser.add_argument('--engine', action='append', choices=sorted(allEngines), help='engine to time (default: all)')
+args = parser.parse_args()
+
+for name in args.engine or sorted(allEngines):
+    with openDBLP(args.input) as f:
+        start = time.time()
+        try:
+            counter = sum(1 for rec in allEngines[name](f))
+        except ImportError as e:
+            print name + ": skipped (" + str(e) + ")"
+            continue
+        elapsed = time.time() - start
+    print "%s: %d records in %.2fs, %.0f records/sec" % (name, counter, elapsed, counter / elapsed)
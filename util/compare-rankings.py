@@ -0,0 +1,108 @@
+# Checks that ranking.py ranks departments exactly as the site does,
+# by running the site's own code (csrankings.js, under node) on the
+# same files for many random choices of areas, years and region, and
+# comparing every department's score, faculty count and place.
+#
+# usage: python util/compare-rankings.py [--selections N] [--seed S] [--js csrankings.js]
+#
+# The JavaScript is given the rows of generated-author-info.csv, the
+# aliases and the country of each institution as CSRankings would
+# have loaded them, and calls the same functions rank() does
+# (buildDepartments, computeStats and sortIndex). Scores must be the
+# same floats, not just close.
+import argparse
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from ranking import Rankings, areas, regions
+
+driver = r'''
+var fs = require('fs');
+var data = JSON.parse(fs.readFileSync(process.argv[1], 'utf8'));
+var noop = function () {};
+var CSRankings = new Function('jQuery', 'Papa', 'd3', 'd3pie', 'Navigo', 'window', 'document', 'setTimeout',
+                              fs.readFileSync(process.argv[2], 'utf8') + '\nreturn CSRankings;')(
+                                  noop, {}, {}, {}, noop, {}, {}, noop);
+// As the constructor (which also sets up the page) fills it in.
+CSRankings.areaMap.forEach(function (m, position) { CSRankings.areas[position] = m.area; });
+Object.keys(data.aliases).forEach(function (k) { CSRankings.aliases[k] = data.aliases[k]; });
+Object.keys(data.countryInfo).forEach(function (k) { CSRankings.countryInfo[k] = data.countryInfo[k]; });
+var results = data.selections.map(function (sel) {
+    var weights = {};
+    var numAreas = 0;
+    CSRankings.areas.forEach(function (a) {
+        weights[a] = sel.areas.indexOf(a) >= 0 ? 1 : 0;
+        numAreas += weights[a];
+    });
+    var adc = {}, deptCounts = {}, deptNames = {}, facultycount = {}, facultyAdjustedCount = {};
+    CSRankings.buildDepartments(data.authors, sel.startyear, sel.endyear, weights, sel.region,
+                                adc, deptCounts, deptNames, facultycount, facultyAdjustedCount);
+    var stats = CSRankings.computeStats(deptNames, adc, CSRankings.areas, numAreas, true, weights);
+    return {order: CSRankings.sortIndex(stats), scores: stats, faculty: deptCounts};
+});
+process.stdout.write(JSON.stringify({areas: CSRankings.areas, results: results}));
+'''
+
+
+def runSite(js, authorInfo, rankings, selections):
+    """The order, scores and faculty counts csrankings.js computes for each selection."""
+    with open(authorInfo) as f:
+        # As Papa.parse hands them over: every field a string.
+        authors = list(csv.DictReader(f))
+    (fd, fname) = tempfile.mkstemp(suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'authors': authors, 'aliases': rankings.aliases, 'countryInfo': rankings.countryInfo,
+                       'selections': selections}, f)
+        out = subprocess.check_output(['node', '-e', driver, fname, js])
+    finally:
+        os.remove(fname)
+    return json.loads(out)
+
+
+parser = argparse.ArgumentParser(description='Check that ranking.py ranks departments exactly as csrankings.js does.')
+parser.add_argument('--selections', type=int, default=200, metavar='N', help='random choices of areas, years and region to compare (default: 200)')
+parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+parser.add_argument('--js', default='csrankings.js', help='the site\'s JavaScript (default: csrankings.js)')
+parser.add_argument('--author-info', default='generated-author-info.csv', metavar='FILE', help='default: generated-author-info.csv')
+args = parser.parse_args()
+
+rankings = Rankings(args.author_info)
+years = sorted(set(rankings.rowYear.tolist()))
+rand = random.Random(args.seed)
+# Every area, then single areas, then random choices.
+selections = [{'areas': list(areas), 'startyear': years[0], 'endyear': years[-1], 'region': 'world'}]
+selections += [{'areas': [a], 'startyear': years[0], 'endyear': years[-1], 'region': 'world'} for a in areas]
+while len(selections) < args.selections:
+    start = rand.choice(years)
+    selections.append({'areas': rand.sample(areas, rand.randint(1, len(areas))), 'startyear': start,
+                       'endyear': rand.choice([y for y in years if y >= start]), 'region': rand.choice(regions)})
+
+site = runSite(args.js, args.author_info, rankings, selections)
+if tuple(site['areas']) != areas:
+    print "ranking.areas is not in the order of CSRankings.areas:", site['areas']
+    sys.exit(1)
+mismatches = 0
+for (sel, result) in zip(selections, site['results']):
+    (score, faculty) = rankings.stats(sel['areas'], sel['startyear'], sel['endyear'], sel['region'])
+    ranked = rankings.rank(sel['areas'], sel['startyear'], sel['endyear'], sel['region'])
+    problems = []
+    if [dept for (_, dept, _, _) in ranked] != result['order'][:len(ranked)]:
+        problems.append('order')
+    for dept in result['order']:
+        i = rankings.institutions.index(dept)
+        if score[i] != result['scores'][dept]:
+            problems.append('score of %s: %r, not %r' % (dept.encode('utf-8'), score[i], result['scores'][dept]))
+        if faculty[i] != result['faculty'][dept]:
+            problems.append('faculty of %s: %d, not %d' % (dept.encode('utf-8'), faculty[i], result['faculty'][dept]))
+    if len(result['order']) != (faculty > 0).sum():
+        problems.append('%d departments ranked, not %d' % ((faculty > 0).sum(), len(result['order'])))
+    if problems:
+        mismatches += 1
+        print "%s %d-%d %s: %s" % (','.join(sel['areas']), sel['startyear'], sel['endyear'], sel['region'], '; '.join(problems[:3]))
+print "%d of %d selections differ from %s." % (mismatches, len(selections), args.js)
+sys.exit(1 if mismatches else 0)
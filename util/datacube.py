@@ -0,0 +1,190 @@
+"""The counts of generated-author-info.csv added up by institution, area and year.
+
+The site ranks departments by reading every row of
+generated-author-info.csv and adding up, for each department, the
+adjusted counts of the selected areas and years (and counting its
+faculty), every time a box is ticked. A Cube holds those sums ahead
+of time, for each institution, area and year: the papers, the
+adjusted papers, and how many of the institution's faculty published
+in that area that year. The answer to any choice of areas and years
+is then a sum over slices of it (see adjustedCounts()).
+
+The areas are the top-level areas and their subareas (such as aaai
+and ijcai within ai, from the subareas of venue-rules.csv); the cells
+of an area include those of its subareas. Faculty are counted under
+their canonical names (from dblp-aliases.csv), as the site counts
+them. A faculty count is of distinct people, so unlike the other two
+it does not add up across areas or years.
+
+writeCube() writes a cube as JSON: for each institution and area, a
+list of counts by year, from firstYear to lastYear:
+
+  {"firstYear": 1995, "lastYear": 2018, "areas": [...],
+   "parents": {"aaai": "ai", ...},
+   "institutions": {"AUEB": {"ai": {"adjustedCount": [...],
+                                    "count": [...],
+                                    "facultyCount": [...]}, ...}, ...}}
+
+Areas an institution has no papers in are left out.
+
+writeYearSums() writes the same counts, and those of each faculty
+member, as running totals over the years (see yearsums.py, which
+reads them): the papers of any span of years are then the total at
+its end less the total before its start. It writes them as .npy
+files from plain arrays, so that it runs where NumPy does not (make
+runs regenerate-data.py under PyPy).
+"""
+from array import array
+import csv
+import json
+import os
+import sys
+from venuerules import rules
+
+# Bumped whenever the layout of the year sums changes.
+yearSumsVersion = 1
+
+
+def readAuthorInfo(fname='generated-author-info.csv'):
+    """Generates the rows of generated-author-info.csv as (name, dept, area, subarea, count, adjusted count, year)."""
+    with open(fname) as f:
+        for row in csv.DictReader(f):
+            yield (unicode(row['name'], 'utf-8'), unicode(row['dept'], 'utf-8'), row['area'], row['subarea'],
+                   float(row['count']), float(row['adjustedcount']), int(row['year']))
+
+
+class Cube(object):
+    """Papers, adjusted papers and faculty by institution, area and year."""
+
+    def __init__(self, aliases={}, rules=rules):
+        # Subarea -> area.
+        self.parents = dict((v.subarea, v.area) for v in rules.lookup.values() if v.subarea)
+        self.topAreas = sorted(set(v.area for v in rules.lookup.values()))
+        self.aliases = aliases
+        # (institution, area, year) -> [count, adjusted count, set of faculty].
+        self.cells = {}
+        # (name, institution, area, year) -> [count, adjusted count].
+        self.authorCells = {}
+
+    def add(self, name, dept, area, subarea, count, adjusted, year):
+        """Adds a row of generated-author-info.csv."""
+        name = self.aliases.get(name, name)
+        for a in (area, subarea) if subarea else (area,):
+            key = (dept, a, year)
+            cell = self.cells.get(key)
+            if cell is None:
+                cell = self.cells[key] = [0.0, 0.0, set()]
+            cell[0] += count
+            cell[1] += adjusted
+            cell[2].add(name)
+            key = (name, dept, a, year)
+            cell = self.authorCells.get(key)
+            if cell is None:
+                cell = self.authorCells[key] = [0.0, 0.0]
+            cell[0] += count
+            cell[1] += adjusted
+
+    def addAll(self, rows):
+        for row in rows:
+            self.add(*row)
+        return self
+
+    def institutions(self):
+        return sorted(set(key[0] for key in self.cells))
+
+    def areas(self):
+        """The areas (and subareas), each area before its subareas."""
+        return [b for a in self.topAreas for b in [a] + sorted(c for c in self.parents if self.parents[c] == a)]
+
+    def years(self):
+        """The first and last year with a paper."""
+        years = [key[2] for key in self.cells]
+        return (min(years), max(years)) if years else (0, -1)
+
+    def adjustedCounts(self, areas, startyear, endyear):
+        """Maps each institution to its adjusted papers in each of areas from startyear to endyear."""
+        counts = {}
+        for ((dept, area, year), cell) in self.cells.iteritems():
+            if area in areas and startyear <= year <= endyear:
+                d = counts.setdefault(dept, {})
+                d[area] = d.get(area, 0.0) + cell[1]
+        return counts
+
+
+def writeCube(cube, fname):
+    """Writes the cube as JSON (see above)."""
+    (first, last) = cube.years()
+    institutions = {}
+    for ((dept, area, year), (count, adjusted, faculty)) in sorted(cube.cells.iteritems()):
+        byYear = institutions.setdefault(dept, {}).get(area)
+        if byYear is None:
+            n = last - first + 1
+            byYear = institutions[dept][area] = {'count': [0] * n, 'adjustedCount': [0] * n, 'facultyCount': [0] * n}
+        i = year - first
+        byYear['count'][i] = int(count) if count == int(count) else count
+        byYear['adjustedCount'][i] = adjusted
+        byYear['facultyCount'][i] = len(faculty)
+    with open(fname, 'w') as f:
+        json.dump({'firstYear': first, 'lastYear': last, 'areas': cube.areas(), 'parents': cube.parents,
+                   'institutions': institutions}, f, separators=(',', ':'), sort_keys=True)
+        f.write('\n')
+
+
+def saveArray(fname, values, shape):
+    """Writes an array (of doubles or 32-bit integers) as a .npy file of the given shape."""
+    descr = ('<' if sys.byteorder == 'little' else '>') + {'d': 'f8', 'i': 'i4'}[values.typecode]
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': (%s), }" % (descr, ''.join('%d, ' % n for n in shape))
+    # The data starts on a multiple of 16 bytes.
+    header += ' ' * (15 - (10 + len(header)) % 16) + '\n'
+    with open(fname, 'wb') as f:
+        f.write('\x93NUMPY\x01\x00')
+        f.write(chr(len(header) & 0xff) + chr(len(header) >> 8))
+        f.write(header)
+        values.tofile(f)
+
+
+def runningTotals(cells, rows, first, years):
+    """The counts and adjusted counts of cells (keyed by a row + (year,)) as running totals: for each row, years + 1 of them, the first 0."""
+    rowIndex = dict((k, i) for (i, k) in enumerate(rows))
+    n = years + 1
+    counts = array('d', [0.0]) * (len(rows) * n)
+    adjusted = array('d', counts)
+    for (key, cell) in cells.iteritems():
+        i = rowIndex[key[:-1]] * n + key[-1] - first + 1
+        counts[i] = cell[0]
+        adjusted[i] = cell[1]
+    for totals in (counts, adjusted):
+        for start in xrange(0, len(totals), n):
+            for i in xrange(start + 1, start + n):
+                totals[i] += totals[i - 1]
+    return (counts, adjusted)
+
+
+def writeYearSums(cube, dirname):
+    """Writes the running totals of the cube's institutions and faculty over the years to dirname (see yearsums.py)."""
+    if not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    (first, last) = cube.years()
+    years = last - first + 1
+    areas = cube.areas()
+    institutions = cube.institutions()
+    # Every institution and area...
+    rows = [(i, a) for i in institutions for a in areas]
+    (counts, adjusted) = runningTotals(cube.cells, rows, first, years)
+    saveArray(os.path.join(dirname, 'institutionCounts.npy'), counts, (len(institutions), len(areas), years + 1))
+    saveArray(os.path.join(dirname, 'institutionAdjusted.npy'), adjusted, (len(institutions), len(areas), years + 1))
+    # ...but only the areas each faculty member has papers in.
+    rows = sorted(set(key[:3] for key in cube.authorCells))
+    authors = sorted(set(row[:2] for row in rows))
+    (authorIndex, areaIndex) = (dict((a, i) for (i, a) in enumerate(authors)), dict((a, i) for (i, a) in enumerate(areas)))
+    (counts, adjusted) = runningTotals(cube.authorCells, rows, first, years)
+    saveArray(os.path.join(dirname, 'authorCounts.npy'), counts, (len(rows), years + 1))
+    saveArray(os.path.join(dirname, 'authorAdjusted.npy'), adjusted, (len(rows), years + 1))
+    saveArray(os.path.join(dirname, 'authorRows.npy'),
+              array('i', [x for (name, dept, area) in rows for x in (authorIndex[(name, dept)], areaIndex[area])]), (len(rows), 2))
+    # The index goes last, so the sums are only usable once they are complete.
+    with open(os.path.join(dirname, 'sums.json'), 'w') as f:
+        json.dump({'version': yearSumsVersion, 'firstYear': first, 'lastYear': last, 'areas': areas,
+                   'parents': cube.parents, 'institutions': institutions,
+                   'authors': [list(a) for a in authors]}, f, indent=2, separators=(',', ': '), sort_keys=True)
+        f.write('\n')
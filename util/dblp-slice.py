@@ -0,0 +1,46 @@
+# Writes the records of an indexed DBLP dump (see dblpindex.py) with the
+# given keys, venues or years as a small DBLP dump of their own,
+# decompressing only the parts of the dump that hold them.
+#
+# e.g. python util/dblp-slice.py dblp.xml.gz --venue PVLDB --years 2015-2017 > pvldb.xml
+import argparse
+import sys
+from dblpindex import DBLPIndex
+from dblpmetrics import Metrics
+
+parser = argparse.ArgumentParser(description='Extract records from an indexed DBLP dump.')
+parser.add_argument('input', nargs='?', default='dblp.xml.gz', help='indexed DBLP dump to read (default: dblp.xml.gz)')
+parser.add_argument('--key', action='append', help='a DBLP key to extract (may be repeated)')
+parser.add_argument('--venue', action='append', help='a booktitle or journal to extract (may be repeated)')
+parser.add_argument('--years', metavar='FIRST-LAST', help='the range of years to extract')
+parser.add_argument('--profile', nargs='?', const='profile.json', metavar='FILE', help='time the phases of the run and write a report to FILE (default: profile.json)')
+parser.add_argument('--profile-interval', type=int, default=10, metavar='S', help='with --profile, print a status line to standard error every S seconds (default: 10, 0 for never)')
+args = parser.parse_args()
+
+index = DBLPIndex.find(args.input)
+if index is None:
+    sys.exit(args.input + ' has no index; write one with util/index-dblp.py.')
+years = None
+if args.years:
+    (first, sep, last) = args.years.partition('-')
+    years = (int(first), int(last or first))
+keys = [k.decode('utf-8') for k in args.key] if args.key else None
+venues = set(v.decode('utf-8') for v in args.venue) if args.venue else None
+
+# The slice goes to standard output, so the status lines go to standard error.
+metrics = Metrics(args.profile_interval, sys.stderr) if args.profile else None
+if metrics is not None:
+    metrics.watchIndex(index)
+out = sys.stdout
+out.write(index.decl + '\n<dblp>\n')
+for raws in index.raw(index.select(keys, venues, years)):
+    if metrics is not None:
+        metrics.push('output')
+    out.writelines(raws)
+    if metrics is not None:
+        metrics.pop()
+        metrics.count(len(raws))
+out.write('</dblp>\n')
+if metrics is not None:
+    metrics.stop()
+    metrics.save(args.profile, input=args.input, key=args.key, venue=args.venue, years=args.years)
@@ -0,0 +1,120 @@
+"""Checkpoints of a long scan, so that an interrupted one can resume.
+
+Every so many records or seconds, dblpscan.scan() saves what its sinks
+have accumulated (see Sink.accumulators) together with how far into
+the dump it got: a row of the index or publication store, or for any
+other dump the number of bytes of (decompressed) records after its
+header. Rows of an indexed dump also record the offset of their gzip
+member in the compressed file, where resuming starts decompressing; a
+plain gzip stream cannot be entered mid-way, so resuming one
+decompresses the bytes before the checkpoint again but does not parse
+them.
+
+Checkpoints are written by a forked child process, which pickles the
+copy-on-write image of the sinks it was forked with, so the scan
+carries on while one is written. A checkpoint only replaces the
+previous one once it is complete.
+"""
+import cPickle
+import hashlib
+import os
+import time
+
+# Bumped whenever the layout changes.
+checkpointVersion = 1
+
+
+def fingerprint(paths, sinks):
+    """Identifies the inputs (besides DBLP) and sinks that a saved state depends on."""
+    h = hashlib.md5()
+    for p in paths:
+        with open(p, 'rb') as f:
+            h.update(f.read())
+    for s in sinks:
+        h.update(type(s).__name__)
+    return h.hexdigest()
+
+
+def dumpIdentity(fname):
+    """Identifies a dump (or store) well enough to tell that it has not changed since a checkpoint."""
+    st = os.stat(fname)
+    return (os.path.abspath(fname), st.st_size, int(st.st_mtime))
+
+
+class Checkpoint(object):
+    """Saves the state of a scan of fname to a file, and loads it back."""
+
+    def __init__(self, path, fname, fprint, records=0, seconds=0):
+        self.path = path
+        self.fprint = (checkpointVersion, fprint, dumpIdentity(fname))
+        self.records = records
+        self.seconds = seconds
+        self.lastCounter = 0
+        self.lastTime = time.time()
+        self.child = None
+        self.saved = 0
+
+    def load(self, sinks):
+        """Restores the sinks from the saved checkpoint, returning (position, counter), or None if there is none for this scan."""
+        try:
+            with open(self.path, 'rb') as f:
+                saved = cPickle.load(f)
+        except (IOError, EOFError, cPickle.UnpicklingError):
+            return None
+        if saved['fingerprint'] != self.fprint or len(saved['states']) != len(sinks):
+            return None
+        for (s, state) in zip(sinks, saved['states']):
+            s.restore(state)
+        self.lastCounter = saved['counter']
+        return (saved['position'], saved['counter'])
+
+    def due(self, counter):
+        """Whether it is time for another checkpoint."""
+        if self.records and counter - self.lastCounter >= self.records:
+            return True
+        return self.seconds and time.time() - self.lastTime >= self.seconds
+
+    def save(self, sinks, counter, position):
+        """Starts writing a checkpoint, unless the previous one is still being written."""
+        if self.child is not None:
+            if os.waitpid(self.child, os.WNOHANG)[0] == 0:
+                return
+            self.child = None
+        self.lastCounter = counter
+        self.lastTime = time.time()
+        saved = {'fingerprint': self.fprint, 'position': position, 'counter': counter,
+                 'states': [s.state() for s in sinks]}
+        if not hasattr(os, 'fork'):
+            self.write(saved)
+            return
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                self.write(saved)
+                status = 0
+            finally:
+                os._exit(status)
+        self.child = pid
+        self.saved += 1
+
+    def write(self, saved):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            cPickle.dump(saved, f, cPickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tmp, self.path)
+
+    def wait(self):
+        """Waits for the checkpoint being written, if any."""
+        if self.child is not None:
+            os.waitpid(self.child, 0)
+            self.child = None
+
+    def remove(self):
+        """Removes the checkpoint once the scan it belongs to has finished."""
+        self.wait()
+        for p in (self.path, self.path + '.tmp'):
+            if os.path.exists(p):
+                os.remove(p)
@@ -0,0 +1,222 @@
+"""Random access to a gzipped DBLP dump.
+
+A gzip stream can only be decompressed from its start, so reaching a
+record in the middle of dblp.xml.gz costs decompressing everything
+before it. An indexed dump is written as a series of independent gzip
+members instead, each holding about memberSize bytes of whole records;
+any gzip reader still sees one stream, but decompression can start at
+any member. The index, kept in a directory next to the dump, records
+where each member starts and, for every record, its member, offset,
+length, DBLP key, venue and year. Reading a slice of the dump (say the
+PVLDB articles of 2015-2017) only decompresses the members that hold
+it.
+
+dblpscan.scan() uses the index of a dump when every sink names the
+venues it needs.
+"""
+from array import array
+from dblpscan import chunks, chunkSize, openDBLP, parsePieces, splitHeader, splitRecords
+from dblpupdate import digest
+from pubstore import StringTable, Strings, writeStrings
+import json
+import numpy
+import os
+import zlib
+
+# Bumped whenever the layout changes.
+indexVersion = 1
+
+# Bytes of XML per gzip member.
+memberSize = 1024 * 1024
+
+
+def indexName(fname):
+    """The directory holding the index of a dump."""
+    return fname + '.index'
+
+
+class IndexWriter(object):
+    """Writes a dump as independent gzip members, together with its index."""
+
+    def __init__(self, fname, header, level=6):
+        self.fname = fname
+        self.level = level
+        self.out = open(fname, 'wb')
+        # Lists and pairs of 32-bit halves rather than arrays of C longs,
+        # which are only 32 bits on some platforms.
+        self.memberStarts = []
+        self.pending = []
+        self.pendingSize = 0
+        self.venues = StringTable()
+        self.member = array('i')
+        self.offset = array('i')
+        self.length = array('i')
+        self.year = array('i')
+        self.venue = array('i')
+        self.keyHashHigh = array('I')
+        self.keyHashLow = array('I')
+        # The header gets a member of its own, so that any member after
+        # it can be decompressed alone.
+        self.pending.append(header + '\n')
+        self.flush()
+
+    def flush(self):
+        """Writes the pending records out as one gzip member."""
+        self.memberStarts.append(self.out.tell())
+        z = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for data in self.pending:
+            self.out.write(z.compress(data))
+        self.out.write(z.flush())
+        self.pending = []
+        self.pendingSize = 0
+
+    def add(self, raw, rec):
+        """Appends a record, given as its raw bytes and its parsed Record."""
+        self.member.append(len(self.memberStarts))
+        self.offset.append(self.pendingSize)
+        self.length.append(len(raw))
+        self.year.append(int(rec.year) if rec.year and rec.year.isdigit() else -1)
+        self.venue.append(self.venues.id(rec.venue()))
+        h = digest((rec.key or u'').encode('utf-8'))
+        self.keyHashHigh.append(h >> 32)
+        self.keyHashLow.append(h & 0xffffffff)
+        self.pending.append(raw)
+        self.pendingSize += len(raw)
+        if self.pendingSize >= memberSize:
+            self.flush()
+
+    def close(self):
+        if self.pending:
+            self.flush()
+        self.pending.append('</dblp>\n')
+        self.flush()
+        self.memberStarts.append(self.out.tell())
+        self.out.close()
+        d = indexName(self.fname)
+        if not os.path.isdir(d):
+            os.makedirs(d)
+
+        def save(name, values, dtype):
+            numpy.save(os.path.join(d, name + '.npy'), numpy.frombuffer(values, dtype=dtype))
+        numpy.save(os.path.join(d, 'memberStarts.npy'), numpy.array(self.memberStarts, dtype=numpy.int64))
+        save('member', self.member, numpy.int32)
+        save('offset', self.offset, numpy.int32)
+        save('length', self.length, numpy.int32)
+        save('year', self.year, numpy.int32)
+        save('venue', self.venue, numpy.int32)
+        keyHash = numpy.frombuffer(self.keyHashHigh, dtype=numpy.uint32).astype(numpy.uint64) << numpy.uint64(32)
+        numpy.save(os.path.join(d, 'keyHash.npy'), keyHash | numpy.frombuffer(self.keyHashLow, dtype=numpy.uint32))
+        writeStrings(d, 'venues', self.venues.strings)
+        # The metadata goes last, so an index is only usable once it is complete.
+        with open(os.path.join(d, 'index.json'), 'w') as f:
+            json.dump({'version': indexVersion, 'records': len(self.member),
+                       'size': os.path.getsize(self.fname)}, f)
+
+
+def writeIndexed(fname, output, level=6, metrics=None):
+    """Copies a dump into an indexed dump, returning the record count.
+
+    With metrics (see dblpmetrics.py), times the phases of the copy;
+    writing the copy and its index is charged to output.
+    """
+    with openDBLP(fname) as f:
+        head = f.read(65536)
+    header = head[:head.index('>', head.index('<dblp')) + 1]
+    writer = IndexWriter(output, header, level)
+    if metrics is not None:
+        metrics.instrument(writer, 'add', 'output')
+        metrics.instrument(writer, 'close', 'output')
+    counter = 0
+    with openDBLP(fname) as f:
+        if metrics is not None:
+            f = metrics.reader(f)
+        (decl, pieces) = chunks(f, chunkSize)
+        for piece in pieces:
+            raws = splitRecords(piece)
+            recs = parsePieces(decl, [piece])
+            if metrics is not None:
+                recs = metrics.iterate(recs, 'parse')
+            recs = list(recs)
+            if len(recs) != len(raws):
+                raise ValueError('could not line up the records of ' + fname + ' with their bytes')
+            for (raw, rec) in zip(raws, recs):
+                writer.add(raw, rec)
+            counter += len(raws)
+            if metrics is not None:
+                metrics.count(len(raws))
+    writer.close()
+    if metrics is not None:
+        metrics.stop()
+    return counter
+
+
+class DBLPIndex(object):
+    """The index of an indexed dump."""
+
+    def __init__(self, fname):
+        d = indexName(fname)
+        with open(os.path.join(d, 'index.json')) as f:
+            meta = json.load(f)
+        if meta['version'] != indexVersion:
+            raise ValueError(d + ' was written by an incompatible version; rebuild it.')
+        if meta['size'] != os.path.getsize(fname):
+            raise ValueError(d + ' does not belong to ' + fname + '; rebuild it.')
+        self.fname = fname
+        self.size = meta['records']
+
+        def load(name):
+            return numpy.load(os.path.join(d, name + '.npy'), mmap_mode='r')
+        self.memberStarts = load('memberStarts')
+        self.member = load('member')
+        self.offset = load('offset')
+        self.length = load('length')
+        self.year = load('year')
+        self.venue = load('venue')
+        self.keyHash = load('keyHash')
+        self.venues = Strings(d, 'venues').all()
+        self.decl = splitHeader(self.readMember(0))[0]
+
+    @staticmethod
+    def find(fname):
+        """The index of a dump, or None if it has none."""
+        if not os.path.isfile(os.path.join(indexName(fname), 'index.json')):
+            return None
+        return DBLPIndex(fname)
+
+    def readMember(self, m):
+        """Decompresses one gzip member."""
+        with open(self.fname, 'rb') as f:
+            f.seek(self.memberStarts[m])
+            data = f.read(self.memberStarts[m + 1] - self.memberStarts[m])
+        return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+
+    def select(self, keys=None, venues=None, years=None):
+        """The rows of the records with one of the keys, in one of the venues and in the year range.
+
+        Each restriction is skipped when None; years is a pair (first, last).
+        """
+        mask = numpy.ones(self.size, dtype=bool)
+        if keys is not None:
+            mask &= numpy.in1d(self.keyHash, [digest(k.encode('utf-8')) for k in keys])
+        if venues is not None:
+            mask &= numpy.in1d(self.venue, [i for (i, v) in enumerate(self.venues) if v in venues])
+        if years is not None:
+            mask &= (self.year >= years[0]) & (self.year <= years[1])
+        return numpy.flatnonzero(mask)
+
+    def raw(self, rows):
+        """Generates the raw bytes of the given rows, in dump order, one list per member."""
+        rows = numpy.asarray(rows)
+        members = self.member[rows]
+        # rows are in dump order, so each member's rows are contiguous.
+        for inMember in numpy.split(rows, numpy.flatnonzero(numpy.diff(members)) + 1):
+            if len(inMember) == 0:
+                continue
+            data = self.readMember(self.member[inMember[0]])
+            yield [data[a:a + n] for (a, n) in zip(self.offset[inMember].tolist(), self.length[inMember].tolist())]
+
+    def records(self, rows, engine='iterparse'):
+        """Generates a Record for each of the given rows, in dump order."""
+        for raws in self.raw(rows):
+            for rec in parsePieces(self.decl, [''.join(raws)], engine):
+                yield rec
@@ -0,0 +1,310 @@
+"""Measuring where the time of a scan goes (--profile).
+
+A Metrics object handed to dblpscan.scan() (or dblpupdate.update(), or
+dblpindex.writeIndexed()) wraps the moving parts of the scan in timers:
+the file it reads, the generator of its records, the sinks' extract(),
+add() and finish(), and the venue rules' verdict(). The time is charged
+to these phases:
+
+    decompress   reading the dump (decompressing it, resolving entities)
+    parse        turning XML (or a publication store's rows) into Records
+    countPaper   deciding whether a paper counts (VenueRules.verdict)
+    accumulate   the rest of the sinks' extract() and add()
+    output       the sinks' finish(), which writes the generated files (or
+                 writing the copy of the dump, for the other scripts)
+    prefilter    dropping raw records that no sink can use
+    checkpoint   starting to save a checkpoint
+    wait         waiting for the workers of a parallel scan
+    other        everything else
+
+Phases nest (the parser reads the dump as it goes, and a sink's
+extract() asks whether the paper counts), and each one is only charged
+the time not spent in a phase nested within it, so on a serial scan the
+phases add up to the wall-clock time. In a parallel scan each worker
+(and the thread that feeds the workers) times its own phases, and
+those are added in, so they add up to more than the wall-clock time.
+
+It also counts records and bytes, both decompressed and compressed,
+how many papers of each venue counted or not (of those with a faculty
+author), and the peak resident set size. While the scan runs it prints
+a status line every `interval` seconds; report() returns all of it as
+a dictionary, which save() writes out as JSON.
+
+Nothing is wrapped unless a scan is given a Metrics, so a scan without
+one costs what it always did. regenerate-data.py, index-dblp.py,
+shrink-dblp.py and dblp-slice.py all take --profile.
+"""
+import json
+import resource
+import sys
+import threading
+import time
+from venuerules import acceptingRules
+
+phases = ('decompress', 'parse', 'countPaper', 'accumulate', 'output', 'prefilter', 'checkpoint', 'wait', 'other')
+
+
+class Timer(object):
+    """The phases of one thread: the time charged to each, and the ones it is in."""
+
+    def __init__(self):
+        self.seconds = {}
+        self.stack = ['other']
+        self.mark = time.time()
+
+    def charge(self, now):
+        phase = self.stack[-1]
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + now - self.mark
+        self.mark = now
+
+
+class Reader(object):
+    """A dump being read, counting its bytes and charging the time to decompress."""
+
+    def __init__(self, f, metrics):
+        self.f = f
+        self.metrics = metrics
+        # The compressed file under a GzipFile (under an EntityReader).
+        self.compressed = getattr(getattr(f, 'f', f), 'fileobj', None)
+        self.start = metrics.compressedBytes
+
+    def read(self, size=-1):
+        m = self.metrics
+        m.push('decompress')
+        try:
+            data = self.f.read(size)
+        finally:
+            m.pop()
+        m.decompressedBytes += len(data)
+        if self.compressed is not None:
+            m.compressedBytes = self.start + self.compressed.tell()
+        else:
+            m.compressedBytes += len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def peakRSS(who=resource.RUSAGE_SELF):
+    """The peak resident set size in bytes (Linux reports it in KB, macOS in bytes)."""
+    rss = resource.getrusage(who).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+class Metrics(object):
+    """Times the phases of a scan and counts what went through it."""
+
+    def __init__(self, interval=10, out=None):
+        """Prints the status lines to out (by default, standard output)."""
+        self.interval = interval
+        self.out = out
+        self.started = time.time()
+        self.stopped = None
+        self.lastStatus = self.started
+        self.recordCount = 0
+        self.decompressedBytes = 0
+        self.compressedBytes = 0
+        # DBLP venue name -> [papers counted, papers not counted].
+        self.venues = {}
+        # Seconds per phase sent back by worker processes.
+        self.workerSeconds = {}
+        # The (object, attribute) pairs wrapped by instrument().
+        self.wrapped = []
+        self.startThreads()
+
+    def startThreads(self):
+        self.local = threading.local()
+        self.timers = []
+        self.main = self.timer()
+
+    def timer(self):
+        """This thread's Timer."""
+        try:
+            return self.local.timer
+        except AttributeError:
+            t = self.local.timer = Timer()
+            self.timers.append(t)
+            return t
+
+    def push(self, phase):
+        t = self.timer()
+        t.charge(time.time())
+        t.stack.append(phase)
+
+    def pop(self):
+        t = self.timer()
+        t.charge(time.time())
+        t.stack.pop()
+
+    def instrument(self, obj, attr, phase, observe=None):
+        """Charges the time in obj.attr() to phase, calling observe(result, *args) after each call."""
+        if attr in obj.__dict__:
+            # Already wrapped (e.g. the rules shared by two sinks).
+            return
+        fn = getattr(obj, attr)
+        push = self.push
+        pop = self.pop
+
+        def timed(*args):
+            push(phase)
+            try:
+                result = fn(*args)
+            finally:
+                pop()
+            if observe is not None:
+                observe(result, *args)
+            return result
+        setattr(obj, attr, timed)
+        self.wrapped.append((obj, attr))
+
+    def watch(self, sinks):
+        """Instruments the sinks of a scan, and the venue rules they use."""
+        for s in sinks:
+            self.instrument(s, 'extract', 'accumulate')
+            self.instrument(s, 'add', 'accumulate')
+            self.instrument(s, 'finish', 'output')
+            rules = getattr(s, 'rules', None)
+            if rules is not None:
+                self.instrument(rules, 'verdict', 'countPaper', self.counted)
+
+    def unwatch(self):
+        """Removes every wrapper that instrument() added."""
+        for (obj, attr) in reversed(self.wrapped):
+            delattr(obj, attr)
+        self.wrapped = []
+
+    def counted(self, result, venue, *args):
+        c = self.venues.get(venue.name)
+        if c is None:
+            c = self.venues[venue.name] = [0, 0]
+        c[0 if result in acceptingRules else 1] += 1
+
+    def memberRead(self, data, m):
+        # Observes DBLPIndex.readMember, which decompresses gzip member m.
+        self.decompressedBytes += len(data)
+        self.compressedBytes += int(self.index.memberStarts[m + 1] - self.index.memberStarts[m])
+
+    def watchIndex(self, index):
+        """Instruments the reads of an indexed dump."""
+        self.index = index
+        self.instrument(index, 'readMember', 'decompress', self.memberRead)
+
+    def reader(self, f):
+        """Wraps the dump being read."""
+        return Reader(f, self)
+
+    def iterate(self, items, phase):
+        """Generates the items, charging the time taken to produce each one to phase."""
+        it = iter(items)
+        push = self.push
+        pop = self.pop
+        while True:
+            push(phase)
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                pop()
+            yield item
+
+    def records(self, recs):
+        """Generates the records, charging their parse and counting them."""
+        for rec in self.iterate(recs, 'parse'):
+            self.recordCount += 1
+            if self.recordCount & 1023 == 0:
+                self.status()
+            yield rec
+
+    def count(self, n):
+        """Counts n more records."""
+        self.recordCount += n
+        self.status()
+
+    def status(self, force=False):
+        """Prints the status line, if it is time for one."""
+        now = time.time()
+        if force or (self.interval and now - self.lastStatus >= self.interval):
+            self.lastStatus = now
+            print >> (self.out or sys.stdout), self.statusLine(now)
+
+    def statusLine(self, now):
+        elapsed = max(now - self.started, 1e-9)
+        return "%d records in %.1fs: %.0f records/s, %.1f MB/s decompressed, %.1f MB/s compressed, peak RSS %d MB." % (
+            self.recordCount, elapsed, self.recordCount / elapsed,
+            self.decompressedBytes / elapsed / 1e6, self.compressedBytes / elapsed / 1e6,
+            peakRSS() >> 20)
+
+    def forked(self):
+        """Starts afresh in a worker process, which sends back what it measures with take()."""
+        self.startThreads()
+        self.venues = {}
+
+    def take(self):
+        """In a worker, returns the seconds per phase since the last take(), leaving out idle time."""
+        seconds = {}
+        for t in self.timers:
+            t.charge(time.time())
+            for (phase, s) in t.seconds.items():
+                if phase != 'other':
+                    seconds[phase] = seconds.get(phase, 0.0) + s
+            t.seconds = {}
+        venues = self.venues
+        self.venues = {}
+        return (seconds, venues)
+
+    def merge(self, taken):
+        """Adds in what a worker's take() returned."""
+        (seconds, venues) = taken
+        for (phase, s) in seconds.items():
+            self.workerSeconds[phase] = self.workerSeconds.get(phase, 0.0) + s
+        for (name, (accepted, rejected)) in venues.items():
+            c = self.venues.get(name)
+            if c is None:
+                c = self.venues[name] = [0, 0]
+            c[0] += accepted
+            c[1] += rejected
+
+    def stop(self):
+        """Ends the measurement, removing the wrappers and printing a last status line."""
+        self.unwatch()
+        self.main.charge(time.time())
+        self.stopped = time.time()
+        self.status(force=True)
+
+    def report(self):
+        """Everything measured, as a dictionary (seconds, bytes, records)."""
+        end = self.stopped or time.time()
+        elapsed = max(end - self.started, 1e-9)
+        seconds = dict(self.workerSeconds)
+        for t in self.timers:
+            for (phase, s) in t.seconds.items():
+                # Only the main thread's idle time is the scan's.
+                if phase != 'other' or t is self.main:
+                    seconds[phase] = seconds.get(phase, 0.0) + s
+        return {
+            'seconds': elapsed,
+            'records': self.recordCount,
+            'recordsPerSecond': self.recordCount / elapsed,
+            'bytes': {'decompressed': self.decompressedBytes, 'compressed': self.compressedBytes},
+            'bytesPerSecond': {'decompressed': self.decompressedBytes / elapsed,
+                               'compressed': self.compressedBytes / elapsed},
+            'phases': dict((p, round(seconds.get(p, 0.0), 3)) for p in phases),
+            'venues': dict((name, {'counted': c[0], 'notCounted': c[1]}) for (name, c) in self.venues.items()),
+            'peakRSS': {'scan': peakRSS(), 'workers': peakRSS(resource.RUSAGE_CHILDREN)},
+        }
+
+    def save(self, fname, **extra):
+        """Writes report(), with any extra fields, to fname as JSON."""
+        report = self.report()
+        report.update(extra)
+        with open(fname, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
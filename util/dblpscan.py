@@ -0,0 +1,697 @@
+"""Single-pass scanning of the DBLP dump.
+
+Decompressing and parsing DBLP is by far the most expensive step in
+rebuilding CSrankings, so the dump is read once and every record is
+handed to a list of sinks (see dblpsinks.py), each of which builds one
+of the generated files.
+
+With jobs > 1 the decompressed dump is cut into pieces at record
+boundaries, the pieces are parsed by a pool of worker processes, and
+their results are handed back to the sinks in dump order.
+
+The dump is read as DBLP publishes it: references to the entities of
+dblp.dtd are turned into character references as it is decompressed
+(see EntityReader), so no DTD is needed to parse it.
+
+With prefilter=True, records that no sink can use are dropped from
+the raw bytes before they are parsed (see Prefilter).
+
+The dump can also be read from a publication store (see pubstore.py),
+which skips the XML parse altogether, and an indexed dump (see
+dblpindex.py) is only decompressed where the sinks' venues are.
+
+A long scan can save checkpoints as it goes, and resume from the last
+one after a crash (see dblpcheckpoint.py), and it can time its phases
+and count its records and bytes (see dblpmetrics.py).
+"""
+from lxml import etree as ElementTree
+from io import BytesIO
+from pagerange import parsePages
+import collections
+import gzip
+import multiprocessing
+import os
+import re
+import threading
+
+# The kinds of records that appear at the top level of dblp.xml (see dblp.dtd).
+recordTags = ('article', 'inproceedings', 'proceedings', 'book', 'incollection',
+              'phdthesis', 'mastersthesis', 'www', 'person', 'data')
+
+# Matches the opening tag of a top-level record.
+recordStart = re.compile('<(?:' + '|'.join(recordTags) + ')[\\s>]')
+
+# Bytes of decompressed XML handed to a worker at a time.
+chunkSize = 4 * 1024 * 1024
+
+# Chunks per worker that a parallel scan reads ahead of its sinks.
+chunksPerWorker = 2
+
+# The encoding named by the XML declaration.
+declEncoding = re.compile(r'encoding=["\']([A-Za-z0-9._-]+)["\']')
+
+# The raw text of a record's first booktitle or journal, and of each author.
+rawVenue = dict((tag, re.compile('<' + tag + r'(?:\s[^>]*)?(?:/>|>(.*?)</' + tag + '>)', re.S))
+                for tag in ('booktitle', 'journal'))
+rawAuthor = re.compile(r'<author(?:\s[^>]*)?>(.*?)</author>', re.S)
+
+# Entity and character references in raw text.
+entityRef = re.compile(r'&(#x[0-9A-Fa-f]+|#[0-9]+|[A-Za-z][\w.-]*);')
+
+# The entities that need no DTD.
+xmlEntities = {'amp': u'&', 'lt': u'<', 'gt': u'>', 'quot': u'"', 'apos': u"'"}
+
+# A general entity declaration, as in <!ENTITY eacute "&#233;">.
+entityDecl = re.compile(r'<!ENTITY\s+([A-Za-z][\w.-]*)\s+"([^"]*)"\s*>')
+
+# A reference to a named entity.
+namedRef = re.compile(r'&([A-Za-z][\w.-]*);')
+
+# The DTD used when there is none next to the dump.
+defaultDTD = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dblp.dtd')
+
+# Single-valued fields kept from each record.
+recordFields = ('booktitle', 'journal', 'volume', 'number', 'year', 'pages', 'url')
+
+
+class Record(object):
+    """The fields of one DBLP record used by the scripts.
+
+    A field is None when the record does not have it; repeated fields
+    keep their first value. Text is stripped, and the title is the
+    record's own text without that of markup such as <i> or <sup>.
+    """
+    __slots__ = ('tag', 'key', 'authors', 'title', 'pageSpan') + recordFields
+
+    def __init__(self, tag, key):
+        self.tag = tag
+        self.key = key
+        self.authors = []
+        self.title = None
+        self.booktitle = None
+        self.journal = None
+        self.volume = None
+        self.number = None
+        self.year = None
+        self.pages = None
+        self.url = None
+        # (first page, page count), once known (see pageRange()).
+        self.pageSpan = None
+
+    def pageRange(self, legacy=False):
+        """The first page and page count of the record, or (-1, -1) if it has no pages.
+
+        With legacy, as the counting rules take them (see pagerange.spans()).
+        """
+        if legacy:
+            return parsePages(self.pages, True) if self.pages is not None else (-1, -1)
+        if self.pageSpan is None:
+            self.pageSpan = parsePages(self.pages) if self.pages is not None else (-1, -1)
+        return self.pageSpan
+
+    def venue(self):
+        """The booktitle of the record, or failing that its journal."""
+        if self.booktitle is not None:
+            return self.booktitle
+        return self.journal
+
+
+def loadEntities(dtd):
+    """Maps the name of each general entity declared in a DTD to its replacement text."""
+    with open(dtd, 'rb') as f:
+        entities = dict(entityDecl.findall(f.read()))
+    for name in xmlEntities:
+        entities.pop(name, None)
+    return entities
+
+
+class EntityReader(object):
+    """Reads the dump, replacing references to DTD entities with their replacement text.
+
+    dblp.dtd declares every entity as a character reference (e.g.
+    &eacute; is &#233;), which means the same in any encoding and
+    needs no DTD to parse. A reference cut in two by a read is held
+    back until the next one.
+    """
+
+    def __init__(self, f, entities):
+        self.f = f
+        self.entities = entities
+        self.held = ''
+
+    def expand(self, m):
+        return self.entities.get(m.group(1), m.group(0))
+
+    def read(self, size=-1):
+        while True:
+            more = self.f.read(size)
+            data = self.held + more
+            self.held = ''
+            if more and size >= 0:
+                amp = data.rfind('&')
+                if amp >= 0 and data.find(';', amp) < 0:
+                    (data, self.held) = (data[:amp], data[amp:])
+            if data or not more:
+                break
+        if '&' in data:
+            data = namedRef.sub(self.expand, data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def openDBLP(fname):
+    """Opens the DBLP dump, decompressing it on the fly if it is gzipped.
+
+    Entities are resolved with the dblp.dtd next to the dump, or failing
+    that the one at the top of this repository.
+    """
+    if fname.endswith('.gz'):
+        f = gzip.open(fname, 'rb')
+    else:
+        f = open(fname, 'rb')
+    dtd = os.path.join(os.path.dirname(fname), 'dblp.dtd')
+    if not os.path.exists(dtd):
+        dtd = defaultDTD
+    if not os.path.exists(dtd):
+        return f
+    return EntityReader(f, loadEntities(dtd))
+
+
+def directText(node):
+    """The stripped text of a node, leaving out the text of its children."""
+    text = node.text or ''
+    for child in node:
+        text += child.tail or ''
+    return text.strip()
+
+
+def makeRecord(node):
+    """Builds a Record from a parsed top-level DBLP element."""
+    rec = Record(node.tag, node.get('key'))
+    for child in node:
+        tag = child.tag
+        if tag == 'author':
+            if child.text is not None:
+                rec.authors.append(child.text.strip())
+        elif tag == 'title':
+            if rec.title is None:
+                rec.title = directText(child)
+        elif tag in recordFields:
+            if getattr(rec, tag) is None:
+                setattr(rec, tag, (child.text or '').strip())
+    return rec
+
+
+class RecordTarget(object):
+    """An lxml parser target that fills in Records straight from parser events.
+
+    Unlike iterparse, it builds no tree: text is collected only for the
+    fields of a record, and finished records queue up in `done` for the
+    caller to take.
+    """
+
+    def __init__(self):
+        self.done = []
+        self.depth = 0
+        self.rec = None
+        self.text = None
+
+    def start(self, tag, attrib):
+        self.depth += 1
+        if self.depth == 2:
+            self.rec = Record(tag, attrib.get('key'))
+        elif self.depth == 3:
+            self.text = []
+
+    def data(self, data):
+        # Text nested more deeply (as in <title>..<i>..</i>..</title>) is skipped.
+        if self.depth == 3:
+            self.text.append(data)
+
+    def end(self, tag):
+        if self.depth == 3:
+            rec = self.rec
+            if tag == 'author':
+                if self.text:
+                    rec.authors.append(''.join(self.text).strip())
+            elif tag == 'title':
+                if rec.title is None:
+                    rec.title = ''.join(self.text).strip()
+            elif tag in recordFields:
+                if getattr(rec, tag) is None:
+                    setattr(rec, tag, ''.join(self.text).strip())
+        elif self.depth == 2:
+            self.done.append(self.rec)
+            self.rec = None
+        self.depth -= 1
+
+    def close(self):
+        pass
+
+
+def targetRecords(f, blockSize=1024 * 1024):
+    """Generates a Record for every top-level element of the dump, using RecordTarget."""
+    target = RecordTarget()
+    parser = ElementTree.XMLParser(target=target)
+    while True:
+        data = f.read(blockSize)
+        if not data:
+            break
+        parser.feed(data)
+        for rec in target.done:
+            yield rec
+        del target.done[:]
+    parser.close()
+    for rec in target.done:
+        yield rec
+
+
+def treeRecords(f):
+    """Generates a Record for every top-level element of the dump, using iterparse."""
+    for (event, node) in ElementTree.iterparse(f, events=('end',), tag=recordTags):
+        yield makeRecord(node)
+        # Drop the record (and anything before it) to keep memory flat.
+        node.clear()
+        while node.getprevious() is not None:
+            del node.getparent()[0]
+
+
+# The ways of turning the dump into Records (see bench-parse.py).
+# Under CPython, iterparse builds each record's small tree in C and is
+# the faster of the two; the target's per-event Python calls cost more
+# than the tree they save.
+engines = {'target': targetRecords, 'iterparse': treeRecords}
+
+
+def records(f, engine='iterparse'):
+    """Generates a Record for every top-level element of the dump."""
+    return engines[engine](f)
+
+
+def splitHeader(buf):
+    """Splits the start of the dump into its XML declaration and whatever follows <dblp>."""
+    decl = ''
+    if buf.startswith('<?xml'):
+        decl = buf[:buf.index('?>') + 2]
+    root = buf.index('<dblp')
+    return (decl, buf[buf.index('>', root) + 1:])
+
+
+def lastRecordStart(buf):
+    """The offset of the last record that starts in buf, or -1 if there is none."""
+    i = len(buf)
+    while True:
+        i = buf.rfind('<', 0, i)
+        if i < 0 or recordStart.match(buf, i):
+            return i
+
+
+def splitRecords(piece):
+    """Splits a piece of the dump (see chunks) into its records' raw bytes."""
+    starts = [m.start() for m in recordStart.finditer(piece)]
+    return [piece[a:b] for (a, b) in zip(starts, starts[1:] + [len(piece)])]
+
+
+def chunks(f, size=chunkSize, skip=0):
+    """Cuts the dump into pieces of roughly size bytes, each made of whole records.
+
+    Returns the dump's XML declaration and a generator of the pieces,
+    leaving out the first skip bytes after the header (which must end
+    on a record boundary).
+    """
+    (decl, buf) = splitHeader(f.read(size))
+    while skip > len(buf):
+        skip -= len(buf)
+        buf = f.read(size)
+        if not buf:
+            break
+    buf = buf[skip:]
+
+    def pieces(buf):
+        while True:
+            data = f.read(size)
+            if not data:
+                break
+            buf += data
+            cut = lastRecordStart(buf)
+            if cut > 0:
+                yield buf[:cut]
+                buf = buf[cut:]
+        end = buf.rfind('</dblp>')
+        if end >= 0:
+            buf = buf[:end]
+        if buf.strip():
+            yield buf
+    return (decl, pieces(buf))
+
+
+def unescape(text):
+    """Expands the character references and predefined entities in raw text.
+
+    Returns None if the text uses an entity that only the DTD defines.
+    """
+    unknown = []
+
+    def expand(m):
+        name = m.group(1)
+        if name.startswith('#x'):
+            return unichr(int(name[2:], 16))
+        if name.startswith('#'):
+            return unichr(int(name[1:]))
+        if name not in xmlEntities:
+            unknown.append(name)
+            return u''
+        return xmlEntities[name]
+    text = entityRef.sub(expand, text)
+    if unknown:
+        return None
+    return text
+
+
+# Returned by Prefilter when raw text cannot be decoded cheaply.
+undecided = object()
+
+
+class Prefilter(object):
+    """Drops the records that no sink can use, working on their raw bytes.
+
+    Only a record's venue and authors are pulled out, with regular
+    expressions, and checked against the venues and authors the sinks
+    declare (see dblpsinks.Sink), exactly as a publication store
+    selects its records. The names are compared as bytes in the dump's
+    encoding; text with references in it is decoded first, and a record
+    whose text cannot be decided without the full parser (markup or DTD
+    entities in it) is kept.
+    """
+
+    def __init__(self, sinks, decl):
+        m = declEncoding.search(decl)
+        self.encoding = m.group(1) if m else 'utf-8'
+        self.wants = [(self.encodeAll(s.venues), self.encodeAll(s.authors)) for s in sinks]
+        self.seen = 0
+        self.passed = 0
+        self.skippedBytes = 0
+
+    @staticmethod
+    def useful(sinks):
+        """Whether every sink limits the records it needs, so that some can be dropped."""
+        return all(s.venues is not None or s.authors is not None for s in sinks)
+
+    def encodeAll(self, names):
+        """The names as a set of byte strings in the dump's encoding, plus the names themselves."""
+        if names is None:
+            return None
+        encoded = set()
+        for name in names:
+            try:
+                encoded.add(name.encode(self.encoding))
+            except UnicodeError:
+                # Such names can only appear as character references.
+                pass
+        return (encoded, names)
+
+    def matches(self, raw, names):
+        """Whether the raw text of an element is one of names: True, False or undecided."""
+        if raw is None:
+            raw = ''
+        if '<' in raw:
+            return undecided
+        if '&' not in raw:
+            return raw.strip() in names[0]
+        text = unescape(raw.decode(self.encoding))
+        if text is None:
+            return undecided
+        return text.strip() in names[1]
+
+    def venueMatches(self, raw, venues):
+        """Whether the record's booktitle (or failing that its journal) is one of venues."""
+        for tag in ('booktitle', 'journal'):
+            m = rawVenue[tag].search(raw)
+            if m is not None:
+                return self.matches(m.group(1), venues)
+        return False
+
+    def authorMatches(self, raw, authors):
+        """Whether any of the record's authors is one of authors."""
+        result = False
+        encoded = authors[0]
+        for a in rawAuthor.findall(raw):
+            if a in encoded:
+                return True
+            # Only text that is not already in its final form needs a closer look.
+            if '&' in a or '<' in a or a != a.strip():
+                hit = self.matches(a, authors)
+                if hit is True:
+                    return True
+                if hit is undecided:
+                    result = undecided
+        return result
+
+    def keep(self, raw):
+        """Whether any sink could use the record."""
+        for (venues, authors) in self.wants:
+            if venues is not None and self.venueMatches(raw, venues) is False:
+                continue
+            if authors is not None and self.authorMatches(raw, authors) is False:
+                continue
+            return True
+        return False
+
+    def filter(self, piece):
+        """The records of a piece of the dump that some sink could use, joined back together."""
+        raws = splitRecords(piece)
+        kept = [r for r in raws if self.keep(r)]
+        self.seen += len(raws)
+        self.passed += len(kept)
+        self.skippedBytes += len(piece) - sum(len(r) for r in kept)
+        return ''.join(kept)
+
+    def report(self):
+        return "%d records seen, %d passed, %d bytes skipped." % (self.seen, self.passed, self.skippedBytes)
+
+
+def parsePieces(decl, pieces, engine='iterparse'):
+    """Generates the Records of each piece of the dump in turn."""
+    for piece in pieces:
+        for rec in records(BytesIO(decl + '<dblp>' + piece + '</dblp>'), engine):
+            yield rec
+
+
+# Set in each worker process of a parallel scan.
+workerSinks = None
+workerDecl = None
+workerMetrics = None
+workerEngine = 'iterparse'
+
+
+def initWorker(sinks, decl, metrics=None, engine='iterparse'):
+    global workerSinks
+    global workerDecl
+    global workerMetrics
+    global workerEngine
+    workerSinks = sinks
+    workerDecl = decl
+    workerMetrics = metrics
+    workerEngine = engine
+    if metrics is not None:
+        metrics.forked()
+
+
+def scanChunk(chunk):
+    """Parses one piece of the dump in a worker.
+
+    Returns its record count, what each sink extracted, and what the
+    worker measured (see dblpmetrics.py), if anything.
+    """
+    items = [[] for s in workerSinks]
+    counter = 0
+    recs = parsePieces(workerDecl, [chunk], workerEngine)
+    if workerMetrics is not None:
+        recs = workerMetrics.iterate(recs, 'parse')
+    for rec in recs:
+        counter += 1
+        for (s, l) in zip(workerSinks, items):
+            item = s.extract(rec)
+            if item is not None:
+                l.append(item)
+    return (counter, items, workerMetrics.take() if workerMetrics is not None else None)
+
+
+def measured(pieces, lengths, transform=None):
+    """Generates the pieces, transformed, and appends to lengths how many bytes of the dump each one stands for.
+
+    Pieces that the transform leaves empty are dropped, and their bytes
+    counted with the next piece.
+    """
+    consumed = 0
+    for piece in pieces:
+        consumed += len(piece)
+        if transform is not None:
+            piece = transform(piece)
+        if piece:
+            lengths.append(consumed)
+            consumed = 0
+            yield piece
+
+
+def bounded(items, slots):
+    """Generates the items, each once it gets one of the slots (a semaphore), which the consumer releases."""
+    for item in items:
+        slots.acquire()
+        yield item
+
+
+def scan(fname, sinks, progress=10000, jobs=1, prefilter=False, checkpoint=None, resume=False, metrics=None,
+         engine='iterparse'):
+    """Parses the dump once, passing each record to every sink in turn.
+
+    fname is dblp.xml, dblp.xml.gz or a publication store directory;
+    an indexed dump is read through its index when every sink names its
+    venues. Prints a progress line every `progress` records (0 disables it),
+    then lets each sink write its output. With jobs > 1, parses XML
+    with that many worker processes. With prefilter, skips the records
+    no sink can use before parsing them and prints how many it
+    skipped. With checkpoint (see dblpcheckpoint.py), saves the sinks'
+    state every so often, and with resume, first carries on from the
+    last checkpoint saved. With metrics (see dblpmetrics.py), times the
+    phases of the scan. engine is the one of engines that parses the
+    XML (a store is not parsed). Returns the count of records parsed.
+    """
+    if metrics is not None:
+        metrics.watch(sinks)
+        if checkpoint is not None:
+            metrics.instrument(checkpoint, 'save', 'checkpoint')
+    counter = 0
+    position = None
+    if checkpoint is not None and resume:
+        saved = checkpoint.load(sinks)
+        if saved is None:
+            print "No checkpoint to resume from, starting from the beginning."
+        else:
+            (position, counter) = saved
+            print "Resuming from the checkpoint after " + str(counter) + " papers."
+    index = None
+    if os.path.isdir(fname + '.index') and all(s.venues is not None for s in sinks):
+        from dblpindex import DBLPIndex
+        try:
+            index = DBLPIndex.find(fname)
+        except ValueError as e:
+            # A stale index (say, the dump was replaced but not re-indexed)
+            # only costs the shortcut.
+            print "Warning: " + str(e) + " Reading the whole dump instead."
+    if os.path.isdir(fname) or index is not None:
+        if os.path.isdir(fname):
+            from pubstore import PublicationStore
+            source = PublicationStore(fname)
+            rows = source.select(sinks)
+        else:
+            source = index
+            rows = index.select(venues=set().union(*[s.venues for s in sinks]))
+            if metrics is not None:
+                metrics.watchIndex(index)
+
+        def locate(n):
+            # The row to resume from, and (in an indexed dump) the
+            # offset of its gzip member.
+            if index is None or n >= len(rows):
+                return ('row', n, None)
+            return ('row', n, int(index.memberStarts[index.member[rows[n]]]))
+        if position is not None and position[0] != 'row':
+            raise ValueError('the checkpoint was saved by a different kind of scan')
+        recs = source.records(rows[counter:]) if index is None else source.records(rows[counter:], engine)
+        if metrics is not None:
+            recs = metrics.records(recs)
+        counter = handleAll(recs, sinks, progress, counter, checkpoint, locate)
+    elif jobs > 1 or prefilter or checkpoint is not None:
+        if position is not None and position[0] != 'byte':
+            raise ValueError('the checkpoint was saved by a different kind of scan')
+        done = position[1] if position is not None else 0
+        with openDBLP(fname) as f:
+            if metrics is not None:
+                f = metrics.reader(f)
+            (decl, pieces) = chunks(f, chunkSize, done)
+            pre = None
+            if prefilter and Prefilter.useful(sinks):
+                pre = Prefilter(sinks, decl)
+                if metrics is not None:
+                    metrics.instrument(pre, 'filter', 'prefilter')
+            lengths = collections.deque()
+            pieces = measured(pieces, lengths, pre.filter if pre is not None else None)
+            if jobs > 1:
+                pool = multiprocessing.Pool(jobs, initWorker, (sinks, decl, metrics, engine))
+                # The pool reads pieces as fast as it can; without a bound,
+                # slow sinks would leave most of the dump in memory, read
+                # and parsed, waiting for them.
+                slots = threading.Semaphore(jobs * chunksPerWorker)
+                results = pool.imap(scanChunk, bounded(pieces, slots))
+                if metrics is not None:
+                    results = metrics.iterate(results, 'wait')
+                for (n, items, taken) in results:
+                    slots.release()
+                    for (s, l) in zip(sinks, items):
+                        for item in l:
+                            s.add(item)
+                    if metrics is not None:
+                        metrics.merge(taken)
+                        metrics.count(n)
+                    if progress:
+                        for c in range(counter - counter % progress + progress, counter + n + 1, progress):
+                            print str(c) + " papers processed."
+                    counter += n
+                    done += lengths.popleft()
+                    if checkpoint is not None and checkpoint.due(counter):
+                        checkpoint.save(sinks, counter, ('byte', done))
+                pool.close()
+                pool.join()
+            else:
+                for piece in pieces:
+                    recs = parsePieces(decl, [piece], engine)
+                    if metrics is not None:
+                        recs = metrics.records(recs)
+                    counter = handleAll(recs, sinks, progress, counter)
+                    done += lengths.popleft()
+                    if checkpoint is not None and checkpoint.due(counter):
+                        checkpoint.save(sinks, counter, ('byte', done))
+            if pre is not None and progress:
+                print pre.report()
+    else:
+        with openDBLP(fname) as f:
+            if metrics is not None:
+                f = metrics.reader(f)
+            recs = records(f, engine)
+            if metrics is not None:
+                recs = metrics.records(recs)
+            counter = handleAll(recs, sinks, progress)
+    if checkpoint is not None:
+        checkpoint.wait()
+    for s in sinks:
+        s.finish()
+    if checkpoint is not None:
+        checkpoint.remove()
+    if metrics is not None:
+        metrics.stop()
+    return counter
+
+
+def handleAll(recs, sinks, progress, counter=0, checkpoint=None, locate=None):
+    """Passes each record to every sink, returning the record count (starting from counter).
+
+    With checkpoint, locate(n) gives the position to save after n records.
+    """
+    for rec in recs:
+        counter += 1
+        if progress and counter % progress == 0:
+            print str(counter) + " papers processed."
+        for s in sinks:
+            s.handle(rec)
+        if checkpoint is not None and checkpoint.due(counter):
+            checkpoint.save(sinks, counter, locate(counter))
+    return counter
@@ -0,0 +1,512 @@
+"""Sinks that turn DBLP records into the generated CSrankings files.
+
+Each sink receives every record of a scan (see dblpscan.py) and writes
+its output from finish(). Each one reproduces the output of the script
+that used to parse DBLP on its own.
+
+Handling a record is split in two: extract() pulls what the sink needs
+out of the record, and add() folds that into the sink's state. In a
+parallel scan extract() runs in the worker processes and add() runs in
+the parent, in dump order, so the results match a serial scan exactly.
+
+Authors are kept as integer ids from an AuthorTable, and their names
+are only looked up again when the output is written.
+"""
+from articleshards import writeShards
+from csrankings import pageCountThreshold, startyear, endyear
+from dblpspill import SpilledLogs
+from jsonstream import JSONListWriter, openOutput
+from scoretable import ScoreTable
+from venuerules import rules, acceptingRules
+import sys
+
+
+class AuthorTable(object):
+    """Dense integer ids for author names.
+
+    The faculty get the first ids, in name order, so that sorting ids
+    sorts the faculty by name; then come the aliases listed in
+    dblp-aliases.csv, and then any name first seen during a scan. The
+    ids of the first two are fixed before a scan starts, so lookups in
+    worker processes agree with the parent.
+    """
+
+    def __init__(self, facultydict, aliasdict={}):
+        self.names = sorted(facultydict)
+        self.facultyCount = len(self.names)
+        self.ids = dict((name, i) for (i, name) in enumerate(self.names))
+        for alias in sorted(aliasdict):
+            self.id(alias)
+
+    def id(self, name):
+        """The id of a name, giving it a new one if it has none."""
+        i = self.ids.get(name)
+        if i is None:
+            i = len(self.names)
+            self.ids[name] = i
+            self.names.append(name)
+        return i
+
+    def faculty(self, names):
+        """The ids of the faculty among names, in order."""
+        ids = self.ids
+        found = []
+        for name in names:
+            i = ids.get(name)
+            if i is not None and i < self.facultyCount:
+                found.append(i)
+        return found
+
+
+class Sink(object):
+    """Base class: ignores every record and writes nothing."""
+
+    # The venues and authors a record needs (at least one of) for the
+    # sink to use it; None means any. Lets scans skip records early.
+    venues = None
+    authors = None
+
+    # The attributes that add() accumulates into; a checkpoint of a scan
+    # saves them (see dblpcheckpoint.py).
+    accumulators = ()
+
+    def extract(self, rec):
+        """Returns what the sink needs from a record, or None to skip it.
+
+        Must not change the sink, since it may run in another process.
+        """
+        return None
+
+    def add(self, item):
+        """Folds an item returned by extract() into the sink's state."""
+        pass
+
+    def handle(self, rec):
+        item = self.extract(rec)
+        if item is not None:
+            self.add(item)
+
+    def finish(self):
+        pass
+
+    def state(self):
+        """What the sink has accumulated so far."""
+        return dict((a, getattr(self, a)) for a in self.accumulators)
+
+    def restore(self, state):
+        """Carries on from a state() saved earlier."""
+        for (a, value) in state.items():
+            setattr(self, a, value)
+
+
+class AuthorInfoSink(Sink):
+    """Builds generated-author-info.csv and articles.json (regenerate-data.py)."""
+
+    accumulators = ('authlogs', 'interestingauthors', 'scores', 'verdicts')
+
+    def __init__(self, facultydict, rules=rules, authorTable=None, memoryBudget=None, spillDir=None,
+                 compact=False, compressed=False, shardDir=None):
+        """With memoryBudget (in bytes), keeps the logs of articles.json on disk beyond it (see dblpspill.py), in spillDir if given.
+
+        compact writes articles.json without indentation, and compressed
+        writes it gzipped, as articles.json.gz (see jsonstream.py).
+        With shardDir, articles.json is written there instead, as one
+        file per institution (see articleshards.py).
+        """
+        self.facultydict = facultydict
+        self.compact = compact
+        self.compressed = compressed
+        self.shardDir = shardDir
+        self.rules = rules
+        self.authorTable = authorTable or AuthorTable(facultydict)
+        self.venues = rules.lookup
+        self.authors = facultydict
+        self.authlogs = {}
+        self.interestingauthors = {}
+        # Papers and adjusted papers by (author, (area, subarea), year).
+        self.scores = ScoreTable(set((v.area, v.subarea) for v in rules.lookup.values()))
+        # (venue, year, rule) -> how many papers with faculty authors
+        # that rule let count or kept out (see VenueRules.verdict).
+        self.verdicts = {}
+        self.spilled = None
+        if memoryBudget is not None:
+            self.spilled = SpilledLogs(memoryBudget, spillDir)
+            self.accumulators = ('spilled',) + self.accumulators[1:]
+
+    def extract(self, rec):
+        """Returns the paper's venue, year and verdict, and the log entry fields and adjusted credit for each faculty author if it counts."""
+        authorList = rec.authors
+        if not authorList:
+            return None
+        authorsOnPaper = len(authorList)
+        facultyOnPaper = self.authorTable.faculty(authorList)
+        if not facultyOnPaper:
+            return None
+        confname = rec.venue()
+        venue = self.rules.lookup.get(confname)
+        if venue is None:
+            return None
+        title = rec.title or u''
+        volume = rec.volume if rec.volume is not None else ""
+        number = rec.number if rec.number is not None else ""
+        url = rec.url if rec.url is not None else ""
+        try:
+            year = int(rec.year if rec.year is not None else "-1")
+        except ValueError:
+            print sys.exc_info()[0]
+            return None
+        # The counting rules take the pages as they always have; the
+        # entries of articles.json get the real range.
+        (startPage, pageCount) = rec.pageRange(legacy=True)
+        verdict = self.rules.verdict(venue, year, volume, number, startPage, pageCount, url)
+        if verdict not in acceptingRules:
+            return (confname, year, verdict, ())
+        (startPage, pageCount) = rec.pageRange()
+        return (confname, year, verdict,
+                [(author, year, title, confname, venue.area,
+                  rec.volume, rec.number, startPage, pageCount,
+                  venue.subarea, 1.0 / authorsOnPaper)
+                 for author in facultyOnPaper])
+
+    def add(self, item):
+        (confname, year, verdict, hits) = item
+        key = (confname, year, verdict)
+        self.verdicts[key] = self.verdicts.get(key, 0) + 1
+        for (author, year, title, confname, areaname, volume, number, startPage, pageCount, subarea, adjusted) in hits:
+            entry = (year, title, confname, areaname, volume, number, startPage, pageCount)
+            if self.spilled is not None:
+                # Sorted as logs() sorts the entries of one author.
+                key = (author, str(year) + confname + title)
+                if self.shardDir is not None:
+                    key = (self.institution(author),) + key
+                self.spilled.add(key, entry, 8 * len(title))
+            else:
+                tmplist = self.authlogs.get(author, [])
+                tmplist.append(entry)
+                self.authlogs[author] = tmplist
+            self.interestingauthors[author] = self.interestingauthors.get(author, 0) + 1
+            self.scores.add(author, (areaname, subarea), year, adjusted)
+
+    def restore(self, state):
+        Sink.restore(self, state)
+        if self.spilled is not None:
+            self.spilled.dropUnlisted()
+
+    def institution(self, author):
+        return self.facultydict[self.authorTable.names[author]]
+
+    def logs(self):
+        """Generates each log entry, with its author's id first, in the order of articles.json.
+
+        When sharding, the entries of each institution come together,
+        in order of institution.
+        """
+        if self.spilled is not None:
+            start = 0 if self.shardDir is None else 1
+            for e in self.spilled.merged():
+                # Leave out the sort key and the sequence number.
+                yield (e[start],) + e[start + 3:]
+            return
+        authlogs = sorted(self.authlogs.items())
+        if self.shardDir is not None:
+            authlogs.sort(key=lambda (author, l): self.institution(author))
+        for (author, l) in authlogs:
+            for entry in sorted(l, key=lambda x: str(x[0]) + x[2] + x[1]):
+                yield (author,) + entry
+
+    def articles(self):
+        """Generates the entries of articles.json."""
+        facultydict = self.facultydict
+        names = self.authorTable.names
+        for (author, year, title, confname, areaname, volume, number, startPage, pageCount) in self.logs():
+            authorName = names[author]
+            # The log is only built here, so that its key order (and
+            # thus articles.json) is the same however the entry got
+            # here (from a worker, a checkpoint or a run on disk).
+            log = {'name': authorName.encode('utf-8'),
+                   'year': year,
+                   'title': title.encode('utf-8'),
+                   'conf': confname,
+                   'area': areaname,
+                   'institution': facultydict[authorName]}
+            if volume is not None:
+                log['volume'] = volume
+            if number is not None:
+                log['number'] = number
+            log['startPage'] = startPage
+            log['pageCount'] = pageCount
+            yield log
+
+    def finish(self):
+        facultydict = self.facultydict
+        names = self.authorTable.names
+        with open('generated-author-info.csv', 'w') as f:
+            f.write('"name","dept","area","subarea","count","adjustedcount","year"\n')
+            # Faculty ids are in name order, so this sorts by name.
+            for (author, (area, subarea), year, count, countAdjusted) in self.scores.items():
+                authorName = names[author]
+                f.write(authorName.encode('utf-8'))
+                f.write(',')
+                f.write((facultydict[authorName].encode('utf-8')))
+                f.write(',')
+                f.write(area)
+                f.write(',')
+                f.write(subarea)
+                f.write(',')
+                f.write(str(count))
+                f.write(',')
+                f.write(str(countAdjusted))
+                f.write(',')
+                f.write(str(year))
+                f.write('\n')
+
+        if self.shardDir is not None:
+            self.shards = writeShards(self.shardDir, self.articles(), self.compact, self.compressed)
+        else:
+            self.writeArticles()
+        if self.spilled is not None:
+            self.spilled.cleanup()
+
+    def writeArticles(self):
+        f = openOutput('articles.json.gz' if self.compressed else 'articles.json', self.compressed)
+        try:
+            writer = JSONListWriter(f, self.compact)
+            writer.writeAll(self.articles())
+            writer.close()
+        finally:
+            f.close()
+
+    def ruleCounts(self):
+        """The verdicts as sorted (venue, year, rule, papers) rows."""
+        return [key + (n,) for (key, n) in sorted(self.verdicts.items())]
+
+
+class CoauthorSink(Sink):
+    """Builds faculty-coauthors.csv (generate-faculty-coauthors.py)."""
+
+    accumulators = ('coauthors', 'papersWritten', 'counter')
+
+    def __init__(self, facultydict, confdict, authorPaperCountThreshold=0, authorTable=None):
+        self.facultydict = facultydict
+        self.confdict = confdict
+        self.authorPaperCountThreshold = authorPaperCountThreshold
+        self.authorTable = authorTable or AuthorTable(facultydict)
+        # Only faculty are written out, and only papers by faculty count
+        # towards their coauthors' paper counts.
+        self.authors = facultydict
+        self.coauthors = {}
+        self.papersWritten = {}
+        self.counter = 0
+
+    def extract(self, rec):
+        """Returns (year, area, faculty ids) for every full-length paper by faculty in range."""
+        if rec.tag != 'inproceedings' and rec.tag != 'article':
+            return None
+        if rec.booktitle is None and rec.journal is None:
+            return None
+        if not rec.authors:
+            return None
+        confname = rec.venue()
+        year = int(rec.year) if rec.year else -1
+        if year < startyear or year > endyear:
+            return None
+        # Count the number of pages. It needs to exceed our threshold to be considered.
+        pageCount = rec.pageRange(legacy=True)[1]
+        if rules.tooFewPages(confname, year, rec.volume, pageCount):
+            return None
+        facultyOnPaper = self.authorTable.faculty(rec.authors)
+        if not facultyOnPaper:
+            return None
+        return (year, self.confdict.get(confname, "na"), facultyOnPaper)
+
+    def add(self, item):
+        (year, areaname, facultyOnPaper) = item
+        coauthors = self.coauthors
+        papersWritten = self.papersWritten
+        for author in facultyOnPaper:
+            if author not in coauthors:
+                coauthors[author] = {}
+            if (year, areaname) not in coauthors[author]:
+                coauthors[author][(year, areaname)] = set([])
+            papersWritten[author] = papersWritten.get(author, 0) + 1
+        self.counter += 1
+        for author in facultyOnPaper:
+            for coauth in facultyOnPaper:
+                if coauth != author:
+                    coauthors[author][(year, areaname)].add(coauth)
+                    coauthors[coauth][(year, areaname)].add(author)
+
+    def finish(self):
+        names = self.authorTable.names
+        o = open('faculty-coauthors.csv', 'w')
+        o.write('"author","coauthor","year","area"\n')
+        for auth in sorted(self.coauthors):
+            for (year, area) in sorted(self.coauthors[auth]):
+                for coauth in sorted(self.coauthors[auth][(year, area)]):
+                    if self.papersWritten[coauth] >= self.authorPaperCountThreshold:
+                        o.write(names[auth].encode('utf-8'))
+                        o.write(',')
+                        o.write(names[coauth].encode('utf-8'))
+                        o.write(',')
+                        o.write(str(year))
+                        o.write(',')
+                        o.write(area)
+                        o.write('\n')
+        o.close()
+
+
+class AllPubsSink(Sink):
+    """Builds all-author-info.csv, counting faculty papers in every venue (generate-all-pubs.py)."""
+
+    accumulators = ('scores',)
+
+    def __init__(self, facultydict, confdict, authorTable=None):
+        self.facultydict = facultydict
+        self.confdict = confdict
+        self.authorTable = authorTable or AuthorTable(facultydict)
+        self.authors = facultydict
+        # Papers and adjusted papers by (author, area, year).
+        self.scores = ScoreTable(set(confdict.values()) | set(['na']))
+
+    def extract(self, rec):
+        """Returns the author, area, year and adjusted credit of each faculty author of a counted paper."""
+        if rec.tag != 'inproceedings' and rec.tag != 'article':
+            return None
+        confname = rec.venue()
+        if not confname:
+            return None
+        authorsOnPaper = len(rec.authors)
+        facultyOnPaper = self.authorTable.faculty(rec.authors)
+        if not facultyOnPaper:
+            return None
+        year = int(rec.year) if rec.year else -1
+        if year == -1 or year < startyear or year > endyear:
+            return None
+        pageCount = rec.pageRange(legacy=True)[1]
+        if rules.tooFewPages(confname, year, rec.volume if rec.volume is not None else 0, pageCount):
+            return None
+        areaname = self.confdict.get(confname, "na")
+        # If we got here, we have a winner.
+        return [(author, areaname, year, 1.0 / authorsOnPaper)
+                for author in facultyOnPaper]
+
+    def add(self, hits):
+        for (author, areaname, year, adjusted) in hits:
+            self.scores.add(author, areaname, year, adjusted)
+
+    def finish(self):
+        names = self.authorTable.names
+        f = open('all-author-info.csv', 'w')
+        f.write('"name","dept","area","count","adjustedcount","year"\n')
+        for (author, area, year, count, countAdjusted) in self.scores.items():
+            authorName = names[author]
+            f.write(authorName.encode('utf-8'))
+            f.write(',')
+            f.write((self.facultydict[authorName]).encode('utf-8'))
+            f.write(',')
+            f.write(area)
+            f.write(',')
+            f.write(str(count))
+            f.write(',')
+            f.write(str(countAdjusted))
+            f.write(',')
+            f.write(str(year))
+            f.write('\n')
+        f.close()
+
+
+class FacultyPaperCountSink(Sink):
+    """Counts the full-length papers of each faculty member in any venue (count-zero-authors.py)."""
+
+    accumulators = ('papers',)
+
+    def __init__(self, facultydict, authorTable=None):
+        self.facultydict = facultydict
+        self.authorTable = authorTable or AuthorTable(facultydict)
+        self.authors = facultydict
+        self.papers = {}
+        # Filled in by finish(): paper counts by faculty name.
+        self.interestingauthors = {}
+
+    def extract(self, rec):
+        """Returns the faculty authors of every full-length paper in range."""
+        if rec.tag != 'inproceedings' and rec.tag != 'article':
+            return None
+        if not rec.year or not rec.year.isdigit():
+            return None
+        year = int(rec.year)
+        if year < startyear or year > endyear:
+            return None
+        # Now, count up how many faculty from our list are on this paper.
+        facultyOnPaper = self.authorTable.faculty(rec.authors)
+        if not facultyOnPaper:
+            return None
+        pageCount = rec.pageRange(legacy=True)[1]
+        if (pageCount > 1) and (pageCount < pageCountThreshold):
+            # Only skip papers with a very small paper count,
+            # but above 1. Why?
+            # DBLP has real papers with incorrect page counts
+            # - usually a truncated single page. -1 means no
+            # pages found at all => some problem with journal
+            # entries in DBLP.
+            return None
+        return facultyOnPaper
+
+    def add(self, facultyOnPaper):
+        for author in facultyOnPaper:
+            self.papers[author] = self.papers.get(author, 0) + 1
+
+    def finish(self):
+        names = self.authorTable.names
+        self.interestingauthors = dict((names[author], count) for (author, count) in self.papers.iteritems())
+
+
+class MissingAuthorsSink(Sink):
+    """Lists faculty members who have no papers at all in DBLP (find-missing-authors.py)."""
+
+    accumulators = ('seen',)
+
+    def __init__(self, facultydict, out=sys.stdout, authorTable=None):
+        self.facultydict = facultydict
+        self.out = out
+        self.authorTable = authorTable or AuthorTable(facultydict)
+        self.authors = facultydict
+        self.seen = set()
+
+    def extract(self, rec):
+        if rec.tag != 'inproceedings' and rec.tag != 'article':
+            return None
+        if rec.booktitle is None and rec.journal is None:
+            return None
+        return self.authorTable.faculty(rec.authors) or None
+
+    def add(self, authors):
+        self.seen.update(authors)
+
+    def finish(self):
+        ids = self.authorTable.ids
+        for name in self.facultydict:
+            if ids[name] not in self.seen:
+                self.out.write(name.encode('utf-8') + '\n')
+
+
+class AliasSink(Sink):
+    """Writes the author aliases listed by DBLP's home-page (www) records (generate-aliases.py)."""
+
+    accumulators = ('lines',)
+
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.lines = []
+
+    def extract(self, rec):
+        if rec.tag != 'www' or len(rec.authors) < 2:
+            return None
+        authorList = [a.encode('utf-8') for a in rec.authors]
+        return [item + "," + authorList[0] + '\n' for item in authorList[1:]]
+
+    def add(self, lines):
+        self.lines.extend(lines)
+
+    def finish(self):
+        self.out.writelines(self.lines)
@@ -0,0 +1,125 @@
+"""Per-author logs kept on disk, for building articles.json in bounded memory.
+
+AuthorInfoSink normally keeps every paper of every faculty member in
+memory until it writes articles.json. Given a memory budget it keeps
+them in a SpilledLogs instead: entries are buffered until their
+estimated size reaches the budget, then sorted and written out as a
+run (a file of marshalled entries), and finally all the runs are
+merged, a few entries of each at a time, into the order articles.json
+lists them in. Each entry carries a sequence number, so that entries
+that sort the same come out in the order they were added, just as the
+in-memory sort leaves them.
+
+When there are more runs than can be merged at once, they are merged
+in passes (at most fanIn at a time).
+
+A SpilledLogs pickles (into a checkpoint) as the list of its runs and
+its buffer; the runs themselves stay where they are. The directory may
+be shared with other files, so only files named like runs are ever
+removed from it, and the directory itself only if it was made here.
+"""
+import heapq
+import marshal
+import os
+import re
+import shutil
+import tempfile
+
+# Runs merged at once.
+fanIn = 64
+
+# A rough size in memory of a buffered entry, beyond its title's.
+entryOverhead = 450
+
+# The names of the runs in the directory.
+runName = re.compile(r'run-\d{6}$')
+
+
+def readRun(fname):
+    """Generates the entries of a run, in order."""
+    with open(fname, 'rb', 1 << 16) as f:
+        while True:
+            try:
+                yield marshal.load(f)
+            except EOFError:
+                return
+
+
+class SpilledLogs(object):
+    """Log entries (sortable tuples) sorted on disk within a memory budget."""
+
+    def __init__(self, budget, dirname=None):
+        self.budget = budget
+        # Only removed by cleanup() if we made it: a temporary directory
+        # entirely, and one made for dirname once it is empty.
+        self.ownDir = dirname is None
+        self.dirname = dirname or tempfile.mkdtemp(prefix='dblp-spill-')
+        self.madeDir = self.ownDir or not os.path.isdir(self.dirname)
+        if not os.path.isdir(self.dirname):
+            os.makedirs(self.dirname)
+        self.buffer = []
+        self.bufferBytes = 0
+        self.runs = []
+        self.written = 0
+        self.seq = 0
+
+    def add(self, key, entry, size):
+        """Adds an entry, which sorts by key and takes about size bytes of memory beyond entryOverhead."""
+        self.buffer.append(key + (self.seq,) + entry)
+        self.seq += 1
+        self.bufferBytes += entryOverhead + size
+        if self.bufferBytes >= self.budget:
+            self.spill()
+
+    def spill(self):
+        """Writes the buffer out as a sorted run."""
+        if not self.buffer:
+            return
+        self.buffer.sort()
+        self.writeRun(self.buffer)
+        self.buffer = []
+        self.bufferBytes = 0
+
+    def writeRun(self, entries):
+        fname = os.path.join(self.dirname, 'run-%06d' % self.written)
+        self.written += 1
+        with open(fname, 'wb', 1 << 16) as f:
+            for e in entries:
+                marshal.dump(e, f)
+        # Only listed once it is complete.
+        self.runs.append(fname)
+
+    def dropUnlisted(self):
+        """Removes the runs in the directory that are not listed, such as those written after a checkpoint of this."""
+        for name in os.listdir(self.dirname):
+            fname = os.path.join(self.dirname, name)
+            if runName.match(name) and fname not in self.runs:
+                os.remove(fname)
+
+    def merged(self):
+        """Generates every entry in order."""
+        self.spill()
+        while len(self.runs) > fanIn:
+            # Merge the oldest runs into one, until one pass will do.
+            group = self.runs[:fanIn]
+            self.runs = self.runs[fanIn:]
+            self.writeRun(heapq.merge(*[readRun(r) for r in group]))
+            for r in group:
+                os.remove(r)
+        return heapq.merge(*[readRun(r) for r in self.runs])
+
+    def cleanup(self):
+        """Removes the runs (and the directory, if it was made here)."""
+        if self.ownDir:
+            shutil.rmtree(self.dirname, ignore_errors=True)
+        else:
+            for r in self.runs:
+                if os.path.exists(r):
+                    os.remove(r)
+            if self.madeDir:
+                try:
+                    os.rmdir(self.dirname)
+                except OSError:
+                    # Something else was put in it since.
+                    pass
+        self.runs = []
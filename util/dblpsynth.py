@@ -0,0 +1,366 @@
+"""Synthetic DBLP dumps, for benchmarking without the real one.
+
+writeDump() writes a dump with as many records as asked for, shaped
+like DBLP's and valid against dblp.dtd (see validate()). The same seed
+and size always give the same bytes, gzip header included, so
+benchmarks of different commits read the same input. The shapes are
+rough fits to DBLP:
+
+    records      mostly inproceedings and articles, with home pages
+                 (www records, some listing aliases), proceedings,
+                 theses, books and chapters in between
+    venues       a fraction `ranked` of the papers are in the venues of
+                 venues.csv, the rest in made-up workshops and journals;
+                 both follow a Zipf law, so a few venues are large
+    years        1970-2024, growing by 8% a year
+    authors      1 to 30 per paper, mostly 2-4; a quarter of the authors
+                 of papers in ranked venues are faculty (a few of them
+                 under an alias of dblp-aliases.csv), and the others are
+                 drawn from a pool in which a few authors write a lot
+    pages        mostly 10-17 ranges (a fifth of them short papers), then
+                 12:1-12:14 article numbers, single pages, none at all,
+                 and roman numerals
+    issues       journals with issue rules in venue-rules.csv get volumes
+                 that match their years, and often the counted issue
+    text         names with accents, written as the entities of dblp.dtd,
+                 and titles with the odd <i> or <sub>
+
+With changed > 0, that fraction of the papers get a revised title (and
+nothing else changes), which gives the next month's dump for
+benchmarking incremental runs.
+"""
+from bisect import bisect_right
+from lxml import etree as ElementTree
+import csv
+import gzip
+import os
+import random
+from dblpscan import chunks, defaultDTD, loadEntities, openDBLP
+from venuerules import readCSV, rules
+
+here = os.path.dirname(os.path.abspath(__file__))
+facultyFile = os.path.join(here, '..', 'faculty-affiliations.csv')
+aliasesFile = os.path.join(here, '..', 'dblp-aliases.csv')
+
+header = '<?xml version="1.0" encoding="ISO-8859-1"?>\n<!DOCTYPE dblp SYSTEM "dblp.dtd">\n<dblp>\n'
+footer = '</dblp>\n'
+
+recordKinds = (('paper', 86), ('www', 8), ('proceedings', 2), ('incollection', 2),
+               ('phdthesis', 1), ('book', 1))
+authorCounts = ((1, 12), (2, 22), (3, 22), (4, 16), (5, 10), (6, 6), (7, 4), (8, 3),
+                (9, 2), (10, 1), (12, 1), (16, 0.5), (30, 0.3))
+pageForms = (('range', 70), ('colon', 8), ('single', 5), ('none', 16), ('roman', 1))
+years = range(1970, 2025)
+
+firstNames = (u'Wei', u'Maria', u'John', u'Li', u'Anna', u'David', u'Yuki', u'Carlos', u'Priya',
+              u'Ahmed', u'Elena', u'Michael', u'J\xfcrgen', u'Ren\xe9e', u'Bj\xf6rn', u'Jos\xe9',
+              u'Fran\xe7ois', u'Zolt\xe1n', u'S\xf8ren', u'In\xeas', u'Olga', u'Rahul', u'Sara',
+              u'Tom\xe1s', u'Hiroshi', u'Fatima', u'Pavel', u'Grace', u'Omar', u'Ingrid')
+lastNames = (u'Zhang', u'Smith', u'M\xfcller', u'Garc\xeda', u'Kumar', u'Nguyen', u'Tanaka',
+             u'Rossi', u'Kowalski', u'Johansson', u'O\'Brien', u'Silva', u'Cohen', u'Ivanov',
+             u'Dubois', u'Kim', u'Chen', u'Patel', u'Andersen', u'Fern\xe1ndez', u'Novak',
+             u'Yilmaz', u'Hansen', u'Sato', u'Lopez', u'Wang', u'Martin', u'Sch\xf6n', u'Ali',
+             u'Brown', u'Lindstr\xf6m', u'Moreau', u'Park', u'Singh', u'Costa', u'Weber')
+words = ('efficient', 'scalable', 'learning', 'verification', 'distributed', 'systems',
+         'analysis', 'networks', 'secure', 'adaptive', 'graph', 'models', 'towards', 'optimal',
+         'robust', 'queries', 'programs', 'memory', 'data', 'algorithms', 'fast', 'inference',
+         'approximate', 'parallel', 'interactive', 'static', 'dynamic', 'privacy', 'neural',
+         'storage', 'compilers', 'protocols', 'bounds', 'via', 'for', 'of', 'with', 'and', 'in')
+
+# Words in the names of journals.
+journalMarks = ('Trans.', 'Proc.', 'J.', 'Commun.')
+journalNames = ('Bioinformatics', 'PVLDB', 'POMACS', 'IMWUT')
+
+
+class Weighted(object):
+    """Draws from weighted values with one random number and a binary search."""
+
+    def __init__(self, choices):
+        self.values = []
+        self.totals = []
+        total = 0.0
+        for (value, weight) in choices:
+            total += weight
+            self.values.append(value)
+            self.totals.append(total)
+        self.total = total
+
+    def draw(self, rnd):
+        return self.values[bisect_right(self.totals, rnd.random() * self.total)]
+
+
+def zipf(values, s=1.0):
+    """Weights values by 1/rank**s."""
+    return Weighted((v, 1.0 / (i + 1) ** s) for (i, v) in enumerate(values))
+
+
+def isJournal(name):
+    return name in journalNames or any(m in name.split() for m in journalMarks)
+
+
+def slug(name):
+    """A DBLP-style key component for a venue name."""
+    s = ''.join(c for c in name.lower() if c.isalnum())
+    return s[:12] or 'x'
+
+
+class Entities(object):
+    """Writes text as DBLP does: ASCII, with the entities of dblp.dtd for everything else."""
+
+    def __init__(self, dtd=defaultDTD):
+        self.names = {u'&': '&amp;', u'<': '&lt;', u'>': '&gt;', u'"': '&quot;'}
+        for (name, ref) in loadEntities(dtd).items():
+            if ref.startswith('&#') and ref.endswith(';'):
+                n = ref[2:-1]
+                c = unichr(int(n[1:], 16) if n.startswith('x') else int(n))
+                # Of two names for a character, the shorter (then first) one.
+                old = self.names.get(c)
+                if old is None or (len(name) + 2, '&' + name + ';') < (len(old), old):
+                    self.names[c] = '&' + name + ';'
+
+    def escape(self, text):
+        out = []
+        for c in text:
+            if c in self.names:
+                out.append(self.names[c])
+            elif ord(c) < 128:
+                out.append(str(c))
+            else:
+                out.append('&#%d;' % ord(c))
+        return ''.join(out)
+
+
+class Synthesizer(object):
+    """Makes up DBLP records, the same ones for the same seed."""
+
+    def __init__(self, seed=0, records=100000, ranked=0.3, changed=0.0,
+                 facultyFile=facultyFile, aliasesFile=aliasesFile):
+        self.rnd = random.Random(seed)
+        # Decides which papers changed without disturbing self.rnd.
+        self.changes = random.Random(seed + 1)
+        self.ranked = ranked
+        self.changed = changed
+        self.entities = Entities()
+        rnd = self.rnd
+        self.kinds = Weighted(recordKinds)
+        self.authorCounts = Weighted(authorCounts)
+        self.pageForms = Weighted(pageForms)
+        self.years = Weighted((y, 1.08 ** (y - years[0])) for y in years)
+        # Ranked venues, largest first in a seeded order.
+        names = sorted(rules.lookup)
+        rnd.shuffle(names)
+        self.rankedVenues = zipf(names, 0.8)
+        others = ['Workshop on %s %s %d' % (rnd.choice(words).title(), rnd.choice(words).title(), i)
+                  for i in range(1500)]
+        others += ['J. %s %s Res. %d' % (rnd.choice(words).title(), rnd.choice(words).title(), i)
+                   for i in range(600)]
+        rnd.shuffle(others)
+        self.otherVenues = zipf(others)
+        # Faculty, a few of them prolific; and their DBLP aliases.
+        with open(facultyFile) as f:
+            faculty = sorted(set(unicode(row[0].strip(), 'utf-8') for row in csv.reader(f)
+                                 if row and row[0] != 'name'))
+        rnd.shuffle(faculty)
+        self.faculty = zipf(faculty, 0.6)
+        self.aliases = sorted(unicode(row['alias'].strip(), 'utf-8') for row in readCSV(aliasesFile))
+        # Other authors: a pool of made-up names about as large as the dump.
+        self.poolSize = max(records, 100)
+        # Journal volumes matching the years, where venue-rules.csv says so.
+        self.volumeOffsets = {}
+        self.issues = {}
+        for (name, venue) in rules.lookup.items():
+            rule = venue.rule
+            if rule is None:
+                continue
+            for (year, r) in sorted(rule.years.items()):
+                if r.issues:
+                    issues = sorted(r.issues)
+                    self.issues[(name, year)] = issues
+                    if issues[0][0].isdigit():
+                        self.volumeOffsets[name] = year - int(issues[0][0])
+        self.serial = 0
+
+    def personName(self):
+        """Someone who is not (known to be) faculty."""
+        i = int(self.poolSize * self.rnd.random() ** 3)
+        name = firstNames[i % len(firstNames)] + u' ' + lastNames[(i // len(firstNames)) % len(lastNames)]
+        homonym = i // (len(firstNames) * len(lastNames))
+        if homonym:
+            name += u' %04d' % homonym
+        return name
+
+    def authors(self, inRanked):
+        n = self.authorCounts.draw(self.rnd)
+        rnd = self.rnd
+        facultyShare = 0.25 if inRanked else 0.01
+        names = []
+        for _ in range(n):
+            r = rnd.random()
+            if r < facultyShare * 0.05:
+                names.append(rnd.choice(self.aliases))
+            elif r < facultyShare:
+                names.append(self.faculty.draw(rnd))
+            else:
+                names.append(self.personName())
+        return names
+
+    def title(self):
+        rnd = self.rnd
+        ws = [rnd.choice(words) for _ in range(rnd.randint(4, 14))]
+        ws[0] = ws[0].title()
+        title = self.entities.escape(u' '.join(ws))
+        r = rnd.random()
+        if r < 0.02:
+            title = title.replace(' ', ' <i>', 1) + '</i>'
+        elif r < 0.03:
+            title += ' O(n<sup>2</sup>)'
+        elif r < 0.04:
+            title += ' for H<sub>2</sub>O'
+        return title + '.'
+
+    def pages(self):
+        """A pages string, or None."""
+        rnd = self.rnd
+        form = self.pageForms.draw(rnd)
+        if form == 'none':
+            return None
+        if rnd.random() < 0.2:
+            length = rnd.randint(1, 5)
+        else:
+            length = max(1, int(rnd.lognormvariate(2.4, 0.45)))
+        first = rnd.randint(1, 2000)
+        if form == 'range':
+            return '%d-%d' % (first, first + length - 1)
+        if form == 'colon':
+            article = rnd.randint(1, 60)
+            return '%d:%d-%d:%d' % (article, 1, article, length)
+        if form == 'single':
+            return str(first)
+        return rnd.choice(('i-xii', 'xi-xx', 'vii', 'ix-xiv'))
+
+    def field(self, out, tag, text):
+        if text is not None:
+            out.append('<%s>%s</%s>\n' % (tag, text, tag))
+
+    def record(self):
+        """The XML of the next record."""
+        rnd = self.rnd
+        self.serial += 1
+        n = self.serial
+        kind = self.kinds.draw(rnd)
+        mdate = '%d-%02d-%02d' % (rnd.randint(2010, 2023), rnd.randint(1, 12), rnd.randint(1, 28))
+        out = []
+        escape = self.entities.escape
+        if kind == 'www':
+            name = self.personName() if rnd.random() < 0.8 else self.faculty.draw(rnd)
+            out.append('<www mdate="%s" key="homepages/%d/%d">\n' % (mdate, n % 997, n))
+            self.field(out, 'author', escape(name))
+            if rnd.random() < 0.15:
+                # DBLP lists other names of the same person after the first.
+                for i in range(rnd.randint(1, 2)):
+                    self.field(out, 'author', escape(self.personName()))
+            self.field(out, 'title', 'Home Page')
+            if rnd.random() < 0.5:
+                self.field(out, 'url', 'https://example.org/~p%d' % n)
+            out.append('</www>\n')
+            return ''.join(out)
+        year = self.years.draw(rnd)
+        if kind == 'paper':
+            inRanked = rnd.random() < self.ranked
+            venue = (self.rankedVenues if inRanked else self.otherVenues).draw(rnd)
+            journal = isJournal(venue)
+            tag = 'article' if journal else 'inproceedings'
+            key = '%s/%s/%s%d' % ('journals' if journal else 'conf', slug(venue), 'p', n)
+            out.append('<%s mdate="%s" key="%s">\n' % (tag, mdate, key))
+            for a in self.authors(inRanked):
+                self.field(out, 'author', escape(a))
+            title = self.title()
+            if self.changed and self.changes.random() < self.changed:
+                title += ' (revised)'
+            self.field(out, 'title', title)
+            self.field(out, 'pages', self.pages())
+            self.field(out, 'year', str(year))
+            if journal:
+                volume = str(max(1, year - self.volumeOffsets.get(venue, 1975)))
+                number = str(rnd.randint(1, 12))
+                issues = self.issues.get((venue, year))
+                if issues and rnd.random() < 0.6:
+                    (volume, number) = rnd.choice(issues)
+                self.field(out, 'volume', volume)
+                self.field(out, 'journal', escape(venue))
+                self.field(out, 'number', number)
+                urlPart = 'journals/%s/%s%s.html' % (slug(venue), slug(venue), volume)
+            else:
+                self.field(out, 'booktitle', escape(venue))
+                part = slug(venue)
+                if venue == 'ICS' and rnd.random() < 0.3:
+                    part = 'innovations'
+                urlPart = 'conf/%s/%s%d.html' % (part, part, year)
+            self.field(out, 'ee', 'https://doi.org/10.9999/%d' % n)
+            self.field(out, 'url', 'db/%s#P%d' % (urlPart, n))
+            if not journal:
+                self.field(out, 'crossref', 'conf/%s/%d' % (slug(venue), year))
+            out.append('</%s>\n' % tag)
+            return ''.join(out)
+        out.append('<%s mdate="%s" key="%s/x/%d">\n' % (kind, mdate, 'phd' if kind == 'phdthesis' else 'books', n))
+        if kind == 'proceedings':
+            for _ in range(rnd.randint(1, 4)):
+                self.field(out, 'editor', escape(self.personName()))
+        else:
+            for a in self.authors(False)[:1 if kind == 'phdthesis' else 4]:
+                self.field(out, 'author', escape(a))
+        self.field(out, 'title', self.title())
+        if kind == 'incollection':
+            self.field(out, 'pages', self.pages())
+            self.field(out, 'booktitle', 'Handbook of %s' % rnd.choice(words).title())
+        self.field(out, 'year', str(year))
+        if kind == 'phdthesis':
+            self.field(out, 'school', 'University of %s' % rnd.choice(lastNames).encode('ascii', 'xmlcharrefreplace'))
+        else:
+            self.field(out, 'publisher', 'Springer')
+            self.field(out, 'isbn', '978-3-%03d-%05d-%d' % (n % 1000, n % 100000, n % 10))
+        out.append('</%s>\n' % kind)
+        return ''.join(out)
+
+
+def writeDump(fname, records, seed=0, ranked=0.3, changed=0.0, level=6):
+    """Writes a synthetic dump of that many records to fname (gzipped if it ends in .gz); returns its size in bytes, uncompressed."""
+    synth = Synthesizer(seed, records, ranked, changed)
+    if fname.endswith('.gz'):
+        raw = open(fname, 'wb')
+        # No name and no time in the header, so that the bytes only
+        # depend on the seed.
+        f = gzip.GzipFile('', 'wb', level, raw, 0)
+    else:
+        raw = None
+        f = open(fname, 'wb')
+    size = 0
+    try:
+        block = [header]
+        for i in range(records):
+            block.append(synth.record())
+            if len(block) >= 1000:
+                data = ''.join(block)
+                size += len(data)
+                f.write(data)
+                block = []
+        block.append(footer)
+        data = ''.join(block)
+        size += len(data)
+        f.write(data)
+    finally:
+        f.close()
+        if raw is not None:
+            raw.close()
+    return size
+
+
+def validate(fname, dtd=defaultDTD):
+    """Checks a dump against dblp.dtd a piece at a time; raises ValueError at the first error."""
+    checker = ElementTree.DTD(dtd)
+    with openDBLP(fname) as f:
+        (decl, pieces) = chunks(f)
+        for piece in pieces:
+            root = ElementTree.fromstring(decl + '<dblp>' + piece + '</dblp>')
+            if not checker.validate(root):
+                raise ValueError(str(checker.error_log.filter_from_errors()[0]))
@@ -0,0 +1,163 @@
+"""Incremental refresh from a new DBLP dump.
+
+DBLP is republished in full every month, but only a small fraction of
+its records change from one dump to the next. update() hashes every
+record of the new dump (and its DBLP key), compares the hashes with a
+manifest saved by the previous run, and parses only the records that
+were added or changed. What the sinks extracted from unchanged records
+is reused from the previous run, and every item is handed to the sinks
+in dump order, so the output is exactly that of a full scan.
+"""
+from dblpcheckpoint import fingerprint
+from dblpscan import chunks, chunkSize, openDBLP, records, splitRecords
+from io import BytesIO
+import cPickle
+import hashlib
+import numpy
+import os
+import re
+import shutil
+import struct
+
+keyAttribute = re.compile(r'\skey="([^"]*)"')
+
+
+def digest(s):
+    """A 64-bit hash of a byte string."""
+    return struct.unpack('<Q', hashlib.md5(s).digest()[:8])[0]
+
+
+def recordKey(raw):
+    """The DBLP key of a raw record (its whole start tag if it has none)."""
+    tag = raw[:raw.index('>') + 1]
+    m = keyAttribute.search(tag)
+    if m is None:
+        return tag
+    return m.group(1)
+
+
+class State(object):
+    """What a previous run saw: the hashes of its records' keys and contents, and their sink items.
+
+    Items are keyed by content hash, since they depend only on the
+    record's bytes (and on the fingerprinted inputs); this also copes
+    with the odd key that appears twice in a dump.
+    """
+
+    def __init__(self, keys, hashes, items):
+        # Both arrays are sorted.
+        self.keys = keys
+        self.hashes = hashes
+        self.items = items
+
+    @staticmethod
+    def empty():
+        return State(numpy.zeros(0, dtype=numpy.uint64), numpy.zeros(0, dtype=numpy.uint64), {})
+
+    @staticmethod
+    def load(dirname, fprint):
+        """Loads a saved state, or returns None if there is none that matches fprint."""
+        try:
+            with open(os.path.join(dirname, 'fingerprint')) as f:
+                if f.read() != fprint:
+                    return None
+            keys = numpy.load(os.path.join(dirname, 'keys.npy'))
+            hashes = numpy.load(os.path.join(dirname, 'hashes.npy'))
+            with open(os.path.join(dirname, 'items.pickle'), 'rb') as f:
+                items = cPickle.load(f)
+        except IOError:
+            return None
+        return State(keys, hashes, items)
+
+    def save(self, dirname, fprint):
+        """Saves the state, replacing any previous one only once it is complete."""
+        tmp = dirname + '.tmp'
+        if os.path.isdir(tmp):
+            shutil.rmtree(tmp)
+        os.makedirs(tmp)
+        numpy.save(os.path.join(tmp, 'keys.npy'), self.keys)
+        numpy.save(os.path.join(tmp, 'hashes.npy'), self.hashes)
+        with open(os.path.join(tmp, 'items.pickle'), 'wb') as f:
+            cPickle.dump(self.items, f, cPickle.HIGHEST_PROTOCOL)
+        with open(os.path.join(tmp, 'fingerprint'), 'w') as f:
+            f.write(fprint)
+        if os.path.isdir(dirname):
+            shutil.rmtree(dirname)
+        os.rename(tmp, dirname)
+
+    def lookup(self, keys, hashes):
+        """For each record, whether the previous run saw its key, and whether it saw its exact contents."""
+        return (contains(self.keys, keys), contains(self.hashes, hashes))
+
+
+def contains(sortedValues, values):
+    """A mask of the values that appear in the sorted array."""
+    if len(sortedValues) == 0:
+        return numpy.zeros(len(values), dtype=bool)
+    pos = numpy.minimum(numpy.searchsorted(sortedValues, values), len(sortedValues) - 1)
+    return sortedValues[pos] == values
+
+
+def update(fname, sinks, statedir, fprint, progress=10000, metrics=None, engine='iterparse'):
+    """Scans a new dump, parsing only the records that differ from the saved state.
+
+    Falls back to parsing everything when there is no saved state for
+    fprint (see dblpcheckpoint.fingerprint()). Saves the new state, lets the sinks
+    write their output, and returns counts of the records inserted,
+    modified, deleted and unchanged since the previous run. With
+    metrics (see dblpmetrics.py), times the phases of the update;
+    engine is the one of dblpscan.engines that parses the changed
+    records.
+    """
+    if metrics is not None:
+        metrics.watch(sinks)
+    old = State.load(statedir, fprint) or State.empty()
+    newKeys = []
+    newHashes = []
+    newItems = {}
+    stats = {'inserted': 0, 'modified': 0, 'deleted': 0, 'unchanged': 0}
+    counter = 0
+    with openDBLP(fname) as f:
+        if metrics is not None:
+            f = metrics.reader(f)
+        (decl, pieces) = chunks(f, chunkSize)
+        for piece in pieces:
+            raws = splitRecords(piece)
+            keys = numpy.array([digest(recordKey(r)) for r in raws], dtype=numpy.uint64)
+            hashes = numpy.array([digest(r) for r in raws], dtype=numpy.uint64)
+            (found, same) = old.lookup(keys, hashes)
+            changed = [r for (r, s) in zip(raws, same) if not s]
+            parsed = records(BytesIO(decl + '<dblp>' + ''.join(changed) + '</dblp>'), engine) if changed else None
+            if parsed is not None and metrics is not None:
+                parsed = metrics.iterate(parsed, 'parse')
+            for (j, h) in enumerate(hashes.tolist()):
+                if same[j]:
+                    items = old.items.get(h)
+                    stats['unchanged'] += 1
+                else:
+                    rec = next(parsed)
+                    items = tuple(s.extract(rec) for s in sinks)
+                    if all(item is None for item in items):
+                        items = None
+                    stats['modified' if found[j] else 'inserted'] += 1
+                if items is not None:
+                    newItems[h] = items
+                    for (s, item) in zip(sinks, items):
+                        if item is not None:
+                            s.add(item)
+                counter += 1
+                if progress and counter % progress == 0:
+                    print str(counter) + " papers processed."
+            newKeys.append(keys)
+            newHashes.append(hashes)
+            if metrics is not None:
+                metrics.count(len(raws))
+    stats['deleted'] = len(old.keys) - stats['unchanged'] - stats['modified']
+    for s in sinks:
+        s.finish()
+    keys = numpy.concatenate(newKeys) if newKeys else numpy.zeros(0, dtype=numpy.uint64)
+    hashes = numpy.concatenate(newHashes) if newHashes else numpy.zeros(0, dtype=numpy.uint64)
+    State(numpy.sort(keys), numpy.sort(hashes), newItems).save(statedir, fprint)
+    if metrics is not None:
+        metrics.stop()
+    return stats
@@ -1,2 +0,0 @@
-#!/bin/sh
-gunzip -dc dblp.xml.gz | awk 'NF' | xmllint --loaddtd --dtdattr --noent --path '.' -  > dblp-fixed.xml
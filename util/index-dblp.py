@@ -0,0 +1,18 @@
+# Copies a DBLP dump into an indexed dump (see dblpindex.py), which
+# tools can read a slice of without decompressing all of it.
+import argparse
+from dblpindex import writeIndexed
+from dblpmetrics import Metrics
+
+parser = argparse.ArgumentParser(description='Write a gzipped DBLP dump that can be read from any record on.')
+parser.add_argument('input', nargs='?', default='dblp-original.xml.gz', help='DBLP dump to read (default: dblp-original.xml.gz)')
+parser.add_argument('output', nargs='?', default='dblp-indexed.xml.gz', help='indexed dump to write (default: dblp-indexed.xml.gz)')
+parser.add_argument('--level', type=int, default=6, choices=range(1, 10), metavar='N', help='gzip compression level, 1-9 (default: 6)')
+parser.add_argument('--profile', nargs='?', const='profile.json', metavar='FILE', help='time the phases of the run and write a report to FILE (default: profile.json)')
+parser.add_argument('--profile-interval', type=int, default=10, metavar='S', help='with --profile, print a status line every S seconds (default: 10, 0 for never)')
+args = parser.parse_args()
+
+metrics = Metrics(args.profile_interval) if args.profile else None
+print "%d records indexed." % writeIndexed(args.input, args.output, args.level, metrics)
+if metrics is not None:
+    metrics.save(args.profile, input=args.input, output=args.output, level=args.level)
@@ -0,0 +1,102 @@
+"""Writing a long JSON list one item at a time (articles.json).
+
+json.dump() needs the whole list in memory, and with indent it uses
+the pure-Python encoder. JSONListWriter writes each item as it comes:
+flat dictionaries of strings and numbers (every entry of articles.json)
+are formatted directly, escaping strings with json's own C escaper, and
+anything else goes through json.JSONEncoder. By default the output is
+byte for byte what json.dump(items, f, indent=2) writes; compact output
+has no indentation or spaces, one item to a line, and parses to the
+same list.
+
+openOutput() opens a file for it, gzipping it on the fly if asked to.
+The gzip header holds no time, so the same items give the same bytes.
+"""
+import gzip
+import json
+from json.encoder import encode_basestring_ascii
+
+indentEncoder = json.JSONEncoder(indent=2)
+compactEncoder = json.JSONEncoder(separators=(',', ':'))
+
+
+def scalar(value):
+    """The JSON of a string, number, boolean or None; or None for anything else."""
+    if isinstance(value, basestring):
+        return encode_basestring_ascii(value)
+    if value is None:
+        return 'null'
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if isinstance(value, (int, long)):
+        return str(value)
+    if isinstance(value, float):
+        return json.dumps(value)
+    return None
+
+
+class JSONListWriter(object):
+    """Writes a JSON list to f, one item at a time; close() ends it."""
+
+    def __init__(self, f, compact=False):
+        self.f = f
+        self.compact = compact
+        self.count = 0
+        if compact:
+            (self.start, self.separator, self.end, self.empty) = ('[', ',\n', ']\n', '[]\n')
+            (self.open, self.itemSeparator, self.keySeparator, self.close_) = ('{', ',', ':', '}')
+        else:
+            # As json.dump(..., indent=2) lays out a list of dictionaries.
+            (self.start, self.separator, self.end, self.empty) = ('[\n  ', ', \n  ', '\n]', '[]')
+            (self.open, self.itemSeparator, self.keySeparator, self.close_) = ('{\n    ', ', \n    ', ': ', '\n  }')
+
+    def format(self, item):
+        if isinstance(item, dict) and item:
+            parts = []
+            for (key, value) in item.iteritems():
+                v = scalar(value)
+                if v is None or not isinstance(key, basestring):
+                    break
+                parts.append(encode_basestring_ascii(key) + self.keySeparator + v)
+            else:
+                return self.open + self.itemSeparator.join(parts) + self.close_
+        if self.compact:
+            return compactEncoder.encode(item)
+        # At the indentation of a list item: '[\n  ' + item + '\n]'.
+        return indentEncoder.encode([item])[4:-2]
+
+    def write(self, item):
+        self.f.write((self.separator if self.count else self.start) + self.format(item))
+        self.count += 1
+
+    def writeAll(self, items):
+        for item in items:
+            self.write(item)
+
+    def close(self):
+        """Ends the list (the file stays open)."""
+        self.f.write(self.end if self.count else self.empty)
+
+
+def openOutput(fname, compressed=False, level=6):
+    """Opens fname for writing, gzipped if compressed."""
+    if not compressed:
+        return open(fname, 'wb')
+    name = fname[:-3] if fname.endswith('.gz') else fname
+    return GzipOutput(fname, name, level)
+
+
+class GzipOutput(gzip.GzipFile):
+    """A gzip file with a fixed header, closing the file under it too."""
+
+    def __init__(self, fname, name, level):
+        self.raw = open(fname, 'wb')
+        gzip.GzipFile.__init__(self, name, 'wb', level, self.raw, 0)
+
+    def close(self):
+        try:
+            gzip.GzipFile.close(self)
+        finally:
+            self.raw.close()
@@ -0,0 +1,12 @@
+# Builds the publication store (see pubstore.py) from the DBLP dump.
+import argparse
+from dblpscan import scan
+from pubstore import StoreSink
+
+parser = argparse.ArgumentParser(description='Write the DBLP fields used by the scripts into a memory-mappable store.')
+parser.add_argument('input', nargs='?', default='dblp.xml.gz', help='DBLP dump to read (default: dblp.xml.gz)')
+parser.add_argument('output', nargs='?', default='dblp-store', help='store directory to write (default: dblp-store)')
+parser.add_argument('--jobs', type=int, default=1, metavar='N', help='parse DBLP with N worker processes')
+args = parser.parse_args()
+
+scan(args.input, [StoreSink(args.output)], jobs=args.jobs)
@@ -0,0 +1,24 @@
+# Writes a synthetic DBLP dump (see dblpsynth.py), for trying out and
+# benchmarking the scripts without the real one.
+#
+# usage: python util/make-synthetic-dblp.py [dblp-synthetic.xml.gz] [--records N] [--seed S]
+import argparse
+import time
+from dblpsynth import validate, writeDump
+
+parser = argparse.ArgumentParser(description='Write a DBLP-shaped dump of made-up records, the same for the same seed.')
+parser.add_argument('output', nargs='?', default='dblp-synthetic.xml.gz', help='dump to write, gzipped if it ends in .gz (default: dblp-synthetic.xml.gz)')
+parser.add_argument('--records', type=int, default=100000, metavar='N', help='number of records (default: 100000)')
+parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+parser.add_argument('--ranked', type=float, default=0.3, metavar='FRACTION', help='fraction of papers in the venues of venues.csv (default: 0.3)')
+parser.add_argument('--changed', type=float, default=0.0, metavar='FRACTION', help='fraction of papers whose title is revised, to make the next dump of the same seed (default: 0)')
+parser.add_argument('--level', type=int, default=6, choices=range(1, 10), metavar='N', help='gzip compression level, 1-9 (default: 6)')
+parser.add_argument('--validate', action='store_true', help='check the dump against dblp.dtd afterwards')
+args = parser.parse_args()
+
+start = time.time()
+size = writeDump(args.output, args.records, args.seed, args.ranked, args.changed, args.level)
+print "%d records (%d bytes uncompressed) written to %s in %.1fs." % (args.records, size, args.output, time.time() - start)
+if args.validate:
+    validate(args.output)
+    print "Valid against dblp.dtd."
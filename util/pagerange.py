@@ -0,0 +1,91 @@
+"""Parsing the pages field of DBLP records.
+
+parsePages() turns a pages string into (first page, page count) with a
+single regular expression. It understands
+
+    10-17            ordinary page ranges
+    12:140-12:150    pages within an article number
+    123, 12:7        single pages
+    e1234            single pages with a letter before the number
+    xi-xx, vii       pages numbered in roman numerals
+
+and returns (0, 0) for anything else. The counting rules were written
+against an older parse that only understood the first two forms, so
+parsePages(pages, legacy=True) gives what that parse did, (0, 0) for
+the others, and the same papers count (see spans()). The same few page
+strings recur across DBLP, so results are memoized; the cache is
+simply emptied when it reaches cacheSize entries.
+"""
+import re
+
+pagesPattern = re.compile(r'''
+      (\d+)-(\d+)                       # 10-17
+    | \d+:([1-9]\d*)-\d+:([1-9]\d*)     # 12:140-12:150
+    | (?:\d+:|[a-z])?(\d+)$             # 123, 12:7 or e1234
+    | ([ivxlcdm]+)(?:-([ivxlcdm]+))?$   # xi-xx or vii
+    ''', re.VERBOSE | re.IGNORECASE)
+
+romanDigits = {'i': 1, 'v': 5, 'x': 10, 'l': 50, 'c': 100, 'd': 500, 'm': 1000}
+
+cacheSize = 1 << 16
+cache = {}
+
+
+def roman(numeral):
+    """The value of a roman numeral."""
+    value = 0
+    largest = 0
+    for digit in reversed(numeral.lower()):
+        d = romanDigits[digit]
+        if d < largest:
+            value -= d
+        else:
+            value += d
+            largest = d
+    return value
+
+
+def spans(pageStr):
+    """The (first page, page count) of a pages string, and the legacy one the counting rules use.
+
+    The first two forms match before the others, just as the old
+    parse tried them, so the legacy span is the real one for those
+    forms and (0, 0) for any other.
+    """
+    m = pagesPattern.match(pageStr)
+    if m is None:
+        return ((0, 0), (0, 0))
+    (first, last, colonFirst, colonLast, single, romanFirst, romanLast) = m.groups()
+    if first is not None:
+        start = int(first)
+        span = (start, int(last) - start + 1)
+        return (span, span)
+    if colonFirst is not None:
+        start = int(colonFirst)
+        span = (start, int(colonLast) - start + 1)
+        return (span, span)
+    if single is not None:
+        return ((int(single), 1), (0, 0))
+    start = roman(romanFirst)
+    if romanLast is None:
+        return ((start, 1), (0, 0))
+    return ((start, roman(romanLast) - start + 1), (0, 0))
+
+
+def parse(pageStr):
+    """The first page and the page count of a pages string, or (0, 0) if it has none."""
+    return spans(pageStr)[0]
+
+
+def parsePages(pageStr, legacy=False):
+    """The first page and the page count of a pages string, or (0, 0) if it has none.
+
+    With legacy, as the counting rules take them (see spans()).
+    """
+    result = cache.get(pageStr)
+    if result is None:
+        result = spans(pageStr) if pageStr is not None else ((0, 0), (0, 0))
+        if len(cache) >= cacheSize:
+            cache.clear()
+        cache[pageStr] = result
+    return result[1] if legacy else result[0]
@@ -0,0 +1,296 @@
+"""A compact columnar store of the DBLP fields used by the scripts.
+
+Parsing the XML dump dominates the cost of every run, so the fields
+the scripts need are written once into flat NumPy arrays that later
+runs memory-map instead. Strings that repeat (authors, venues,
+volumes, numbers, pages) are dictionary-encoded; years and page
+numbers are integer columns (the records read back carry the parsed
+pages, see Record.pageRange(), and the few years that are not plain
+numbers are kept as strings); each record's authors are a slice of
+one flat array of author ids, located through an offsets array.
+
+A store is a directory; dblpscan.scan() reads one wherever it would
+read dblp.xml or dblp.xml.gz, and yields the same records in the same
+order, so every sink produces the same output from either.
+"""
+from array import array
+from dblpscan import Record, recordTags
+from dblpsinks import Sink
+import json
+import mmap
+import numpy
+import os
+
+# Bumped whenever the layout changes.
+storeVersion = 6
+
+# Dictionary-encoded string columns, and the string table each one uses.
+codedColumns = (('booktitle', 'venues'),
+                ('journal', 'venues'),
+                ('volume', 'values'),
+                ('number', 'values'),
+                ('pages', 'pages'))
+
+# String columns that are mostly distinct, kept as plain string heaps.
+heapColumns = ('key', 'title', 'url')
+
+
+def yearNumber(year):
+    """A year as the year column holds it: its value, or -1 if it is missing or not written as a plain number."""
+    if year and year.isdigit() and len(year) < 10 and str(int(year)) == year:
+        return int(year)
+    return -1
+
+
+def offsets(lengths):
+    """The int64 offsets (from 0 to the total) of consecutive items with the given lengths, an array('i')."""
+    ends = numpy.cumsum(numpy.frombuffer(lengths, dtype=numpy.int32), dtype=numpy.int64)
+    return numpy.concatenate((numpy.zeros(1, dtype=numpy.int64), ends))
+
+
+def writeStrings(dirname, name, strings):
+    """Writes a list of strings as one UTF-8 heap plus an offsets array."""
+    # Lengths rather than offsets, which need not fit in a C long.
+    lengths = array('i')
+    with open(os.path.join(dirname, name + '.utf8'), 'wb') as f:
+        for s in strings:
+            b = s.encode('utf-8')
+            f.write(b)
+            lengths.append(len(b))
+    numpy.save(os.path.join(dirname, name + '.offsets.npy'), offsets(lengths))
+
+
+class Strings(object):
+    """A memory-mapped string heap written by writeStrings."""
+
+    def __init__(self, dirname, name):
+        self.offsets = numpy.load(os.path.join(dirname, name + '.offsets.npy'), mmap_mode='r')
+        with open(os.path.join(dirname, name + '.utf8'), 'rb') as f:
+            if self.offsets[-1] > 0:
+                self.heap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.heap = ''
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.heap[self.offsets[i]:self.offsets[i + 1]].decode('utf-8')
+
+    def gather(self, rows):
+        """The strings at the given indexes."""
+        heap = self.heap
+        starts = self.offsets[rows].tolist()
+        ends = self.offsets[rows + 1].tolist()
+        return [heap[a:b].decode('utf-8') for (a, b) in zip(starts, ends)]
+
+    def all(self):
+        """Decodes every string (for the small, dictionary-encoded tables)."""
+        return self.gather(numpy.arange(len(self)))
+
+
+class StringTable(object):
+    """Assigns dense integer ids to strings as they are first seen."""
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def id(self, s):
+        if s is None:
+            return -1
+        i = self.ids.get(s)
+        if i is None:
+            i = len(self.strings)
+            self.ids[s] = i
+            self.strings.append(s)
+        return i
+
+
+class StoreSink(Sink):
+    """Writes every record of a scan into a publication store."""
+
+    def __init__(self, dirname):
+        self.dirname = dirname
+        self.tables = {'venues': StringTable(), 'values': StringTable(),
+                       'pages': StringTable(), 'authors': StringTable()}
+        self.columns = dict((c, array('i')) for (c, t) in codedColumns)
+        self.heaps = dict((c, []) for c in heapColumns)
+        self.tag = array('b')
+        self.hasTitle = array('b')
+        self.hasURL = array('b')
+        self.year = array('i')
+        # The values id of each year not in the year column, or -1.
+        self.yearText = array('i')
+        self.startPage = array('i')
+        self.pageCount = array('i')
+        self.authorIds = array('i')
+        self.authorCounts = array('i')
+
+    def extract(self, rec):
+        return rec
+
+    def add(self, rec):
+        tables = self.tables
+        self.tag.append(recordTags.index(rec.tag))
+        for (c, t) in codedColumns:
+            self.columns[c].append(tables[t].id(getattr(rec, c)))
+        self.heaps['key'].append(rec.key or u'')
+        # A missing title or url is kept as None (see hasTitle and hasURL).
+        self.heaps['title'].append(rec.title if rec.title is not None else u'')
+        self.heaps['url'].append(rec.url if rec.url is not None else u'')
+        self.hasTitle.append(rec.title is not None)
+        self.hasURL.append(rec.url is not None)
+        year = yearNumber(rec.year)
+        self.year.append(year)
+        self.yearText.append(tables['values'].id(rec.year if year < 0 else None))
+        (start, count) = rec.pageRange()
+        self.startPage.append(start)
+        self.pageCount.append(count)
+        authors = tables['authors']
+        for a in rec.authors:
+            self.authorIds.append(authors.id(a))
+        self.authorCounts.append(len(rec.authors))
+
+    def finish(self):
+        d = self.dirname
+        if not os.path.isdir(d):
+            os.makedirs(d)
+
+        def save(name, values, dtype):
+            numpy.save(os.path.join(d, name + '.npy'), numpy.frombuffer(values, dtype=dtype))
+        save('tag', self.tag, numpy.int8)
+        save('hasTitle', self.hasTitle, numpy.int8)
+        save('hasURL', self.hasURL, numpy.int8)
+        save('year', self.year, numpy.int32)
+        save('yearText', self.yearText, numpy.int32)
+        save('startPage', self.startPage, numpy.int32)
+        save('pageCount', self.pageCount, numpy.int32)
+        save('authorIds', self.authorIds, numpy.int32)
+        numpy.save(os.path.join(d, 'authorOffsets.npy'), offsets(self.authorCounts))
+        for (c, t) in codedColumns:
+            save(c, self.columns[c], numpy.int32)
+        for (name, table) in self.tables.items():
+            writeStrings(d, name, table.strings)
+        for (c, strings) in self.heaps.items():
+            writeStrings(d, c, strings)
+        # The metadata goes last, so a store is only usable once it is complete.
+        with open(os.path.join(d, 'store.json'), 'w') as f:
+            json.dump({'version': storeVersion, 'records': len(self.tag)}, f)
+
+
+class PublicationStore(object):
+    """A publication store opened read-only through mmap."""
+
+    def __init__(self, dirname):
+        with open(os.path.join(dirname, 'store.json')) as f:
+            meta = json.load(f)
+        if meta['version'] != storeVersion:
+            raise ValueError(dirname + ' was written by an incompatible version; rebuild it.')
+        self.size = meta['records']
+
+        def load(name):
+            return numpy.load(os.path.join(dirname, name + '.npy'), mmap_mode='r')
+        self.tag = load('tag')
+        self.hasTitle = load('hasTitle')
+        self.hasURL = load('hasURL')
+        self.year = load('year')
+        self.yearText = load('yearText')
+        self.startPage = load('startPage')
+        self.pageCount = load('pageCount')
+        self.authorIds = load('authorIds')
+        self.authorOffsets = load('authorOffsets')
+        self.columns = dict((c, load(c)) for (c, t) in codedColumns)
+        self.tables = dict((t, Strings(dirname, t)) for t in ('venues', 'values', 'pages', 'authors'))
+        self.heaps = dict((c, Strings(dirname, c)) for c in heapColumns)
+
+    def venue(self):
+        """The venue id of every record: its booktitle, or failing that its journal."""
+        booktitle = self.columns['booktitle']
+        return numpy.where(booktitle >= 0, booktitle, self.columns['journal'])
+
+    def withVenues(self, names):
+        """A mask of the records whose venue is one of names."""
+        table = self.tables['venues'].all()
+        ids = [i for (i, v) in enumerate(table) if v in names]
+        return numpy.in1d(self.venue(), ids)
+
+    def withAuthors(self, names):
+        """A mask of the records with at least one author in names."""
+        table = self.tables['authors'].all()
+        ids = [i for (i, a) in enumerate(table) if a in names]
+        hit = numpy.in1d(self.authorIds, ids)
+        counts = numpy.diff(self.authorOffsets)
+        rows = numpy.repeat(numpy.arange(self.size), counts)[hit]
+        mask = numpy.zeros(self.size, dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def select(self, sinks):
+        """The indexes of the records that at least one of the sinks could use.
+
+        A sink limits what it needs through its venues and authors
+        attributes (None means it needs every record).
+        """
+        mask = numpy.zeros(self.size, dtype=bool)
+        for s in sinks:
+            if s.venues is None and s.authors is None:
+                return numpy.arange(self.size)
+            wanted = numpy.ones(self.size, dtype=bool)
+            if s.venues is not None:
+                wanted &= self.withVenues(s.venues)
+            if s.authors is not None:
+                wanted &= self.withAuthors(s.authors)
+            mask |= wanted
+        return numpy.flatnonzero(mask)
+
+    def records(self, rows=None, blockSize=65536):
+        """Generates a Record for each of the given rows (all of them by default), in dump order."""
+        if rows is None:
+            rows = numpy.arange(self.size)
+        tables = dict((t, self.tables[t].all()) for t in ('venues', 'values', 'pages'))
+        authors = self.tables['authors']
+        authorNames = {}
+        for block in xrange(0, len(rows), blockSize):
+            r = numpy.asarray(rows[block:block + blockSize])
+            tags = self.tag[r].tolist()
+            years = self.year[r].tolist()
+            yearTexts = self.yearText[r].tolist()
+            hasTitle = self.hasTitle[r].tolist()
+            hasURL = self.hasURL[r].tolist()
+            spans = zip(self.startPage[r].tolist(), self.pageCount[r].tolist())
+            keys = self.heaps['key'].gather(r)
+            titles = self.heaps['title'].gather(r)
+            urls = self.heaps['url'].gather(r)
+            coded = [(c, self.columns[c][r].tolist(), tables[t]) for (c, t) in codedColumns]
+            # Gather the author ids of every row in the block at once.
+            starts = self.authorOffsets[r]
+            counts = self.authorOffsets[r + 1] - starts
+            firsts = numpy.cumsum(counts) - counts
+            ids = self.authorIds[numpy.repeat(starts - firsts, counts) + numpy.arange(counts.sum())].tolist()
+            counts = counts.tolist()
+            pos = 0
+            for j in xrange(len(tags)):
+                rec = Record(recordTags[tags[j]], keys[j] or None)
+                for a in ids[pos:pos + counts[j]]:
+                    name = authorNames.get(a)
+                    if name is None:
+                        name = authors[a]
+                        authorNames[a] = name
+                    rec.authors.append(name)
+                pos += counts[j]
+                if hasTitle[j]:
+                    rec.title = titles[j]
+                if hasURL[j]:
+                    rec.url = urls[j]
+                # The pages as the store parsed them ((-1, -1) for none),
+                # so the sinks need not parse them again.
+                rec.pageSpan = spans[j]
+                for (c, column, table) in coded:
+                    if column[j] >= 0:
+                        setattr(rec, c, table[column[j]])
+                if years[j] >= 0:
+                    rec.year = str(years[j])
+                elif yearTexts[j] >= 0:
+                    rec.year = tables['values'][yearTexts[j]]
+                yield rec
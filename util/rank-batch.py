@@ -0,0 +1,90 @@
+# Ranks departments for a batch of choices of areas (and years and
+# regions) at once, as sensitivity studies need, and writes every
+# department's score, rank and faculty count for each choice to .npy
+# files (see ranking.writeBatch).
+#
+# usage: python util/rank-batch.py [--areas A,B,...] [--leave-one-out | --subsets | --random N | --selections FILE]
+#                                  [--startyear Y] [--endyear Y] [--window W] [--region R] [--output DIR]
+#
+# The choices are subsets of --areas (all of them by default): just
+# those areas, or each of them left out in turn, or every subset, or N
+# random ones. A --selections file is a CSV with a column per area
+# (its weight; areas without a column get 0) and optionally startyear,
+# endyear and region columns. With --window W, each choice is ranked
+# for every span of W years from startyear to endyear.
+import argparse
+import csv
+import itertools
+import numpy
+import random
+import time
+from ranking import Rankings, areas, regions, writeBatch
+from venuerules import startyear, endyear
+
+parser = argparse.ArgumentParser(description='Rank departments for a batch of choices of areas.')
+parser.add_argument('--areas', default=','.join(areas), help='the areas to choose from, comma-separated (default: all)')
+study = parser.add_mutually_exclusive_group()
+study.add_argument('--leave-one-out', action='store_true', help='all the areas, then each left out in turn')
+study.add_argument('--subsets', action='store_true', help='every subset of the areas')
+study.add_argument('--random', type=int, metavar='N', help='N random subsets of the areas')
+study.add_argument('--selections', metavar='FILE', help='a CSV file of weights by area, a row per choice')
+parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+parser.add_argument('--startyear', type=int, default=startyear, help='default: %d' % startyear)
+parser.add_argument('--endyear', type=int, default=endyear, help='default: %d' % endyear)
+parser.add_argument('--window', type=int, metavar='W', help='rank each choice for every span of W years')
+parser.add_argument('--region', default='world', choices=regions, help='default: world')
+parser.add_argument('--output', default='generated-rank-batch', metavar='DIR', help='default: generated-rank-batch')
+parser.add_argument('--chunk', type=int, default=1024, help='choices ranked at a time (default: 1024)')
+parser.add_argument('--author-info', default='generated-author-info.csv', metavar='FILE', help='default: generated-author-info.csv')
+args = parser.parse_args()
+
+chosen = args.areas.split(',')
+unknown = set(chosen) - set(areas)
+if unknown:
+    parser.error('unknown areas: ' + ', '.join(sorted(unknown)))
+columns = [areas.index(a) for a in chosen]
+
+
+def weightsOf(subsets):
+    weights = numpy.zeros((len(subsets), len(areas)))
+    for (i, subset) in enumerate(subsets):
+        weights[i, [columns[j] for j in subset]] = 1.0
+    return weights
+
+
+(startyears, endyears, rowRegions) = (args.startyear, args.endyear, args.region)
+everything = range(len(columns))
+if args.selections:
+    with open(args.selections) as f:
+        rows = list(csv.DictReader(f))
+    weights = numpy.array([[float(row.get(a) or 0) for a in areas] for row in rows])
+    startyears = [int(row.get('startyear') or args.startyear) for row in rows]
+    endyears = [int(row.get('endyear') or args.endyear) for row in rows]
+    rowRegions = [row.get('region') or args.region for row in rows]
+elif args.leave_one_out:
+    weights = weightsOf([everything] + [[j for j in everything if j != i] for i in everything if len(columns) > 1])
+elif args.subsets:
+    if len(columns) > 20:
+        parser.error('too many subsets; choose at most 20 --areas')
+    weights = weightsOf([s for k in everything for s in itertools.combinations(everything, k + 1)])
+elif args.random:
+    rand = random.Random(args.seed)
+    weights = weightsOf([rand.sample(everything, rand.randint(1, len(columns))) for _ in xrange(args.random)])
+else:
+    weights = weightsOf([everything])
+
+if args.window:
+    # Every choice, for each span of years in turn.
+    spans = [(y, y + args.window - 1) for y in xrange(args.startyear, args.endyear - args.window + 2)]
+    n = len(weights)
+    weights = numpy.tile(weights, (len(spans), 1))
+    startyears = numpy.repeat([s for (s, _) in spans], n)
+    endyears = numpy.repeat([e for (_, e) in spans], n)
+    if not isinstance(rowRegions, basestring):
+        rowRegions = rowRegions * len(spans)
+
+start = time.time()
+rankings = Rankings(args.author_info)
+writeBatch(rankings, args.output, weights, startyears, endyears, rowRegions, args.chunk)
+print "Ranked %d departments for %d choices in %.1f seconds; results in %s." % (
+    len(rankings.institutions), len(weights), time.time() - start, args.output)
@@ -0,0 +1,424 @@
+"""Department rankings computed as the site computes them, without a browser.
+
+csrankings.ts ranks departments from generated-author-info.csv: for
+the areas, years and region chosen, it adds up the adjusted papers of
+each department's faculty in each area (buildDepartments), counts the
+faculty with at least one of those papers, and scores each department
+by the geometric mean of its adjusted papers plus one over the areas
+(computeStats). Rankings does the same from the same files, as array
+operations over all the rows and departments at once:
+
+    rankings = Rankings()
+    for (rank, dept, score, faculty) in rankings.rank(['plan', 'soft'], 2008, 2018):
+        ...
+
+It follows the site to the last bit: the same rows count (names
+mapped through dblp-aliases.csv, each faculty member counted once, in
+the first department they turn up in), the adjusted papers are added
+up in the order of the file, the areas multiplied in the order of the
+site's areaMap, and the root taken with the pow the site's Math.pow
+uses (jsPow), so the scores are the same floats the site computes and
+the departments come out in the same order with the same
+(competition) ranks. compare-rankings.py checks this against
+csrankings.js.
+
+batch() ranks departments for many choices of areas (and years and
+regions) at once, given as a matrix of weights with a row per choice
+(every choice that leaves out one area, say). The scores of a choice
+are a product over the columns of one institution x area matrix of
+adjusted papers per span of years, and its faculty counts come from
+matrix products over the few distinct ways faculty's rows fall into
+departments (see facultyRuns()), so each chunk of choices costs a few
+array operations rather than a pass over the rows per choice.
+writeBatch() writes the results to .npy files as they come;
+rank-batch.py runs it.
+"""
+import csv
+import json
+import numpy
+import os
+from venuerules import rules, startyear, endyear
+
+# The areas the site offers, in the order of CSRankings.areaMap in
+# csrankings.ts: the geometric mean multiplies them in this order.
+areas = ('ai', 'vision', 'mlmining', 'nlp', 'ir', 'arch', 'comm', 'sec', 'mod', 'hpc', 'mobile', 'metrics',
+         'ops', 'plan', 'soft', 'act', 'crypt', 'log', 'graph', 'chi', 'robotics', 'bio', 'da', 'bed', 'vis', 'ecom')
+
+# The regions of the site's menu (see CSRankings.inRegion). An
+# institution missing from country-info.csv is in the USA.
+regions = ('world', 'USA', 'europe', 'canada', 'northamerica', 'australasia', 'southamerica', 'asia')
+
+
+def readPairs(fname, key, value):
+    """Maps column key of a CSV file to column value."""
+    with open(fname) as f:
+        return dict((unicode(row[key], 'utf-8'), unicode(row[value], 'utf-8')) for row in csv.DictReader(f))
+
+
+def inRegion(region, country):
+    """Whether an institution in country (a region of country-info.csv, or None for the USA) is in region."""
+    if region == 'USA':
+        return country is None
+    if region == 'northamerica':
+        return country is None or country == 'canada'
+    if region in regions and region != 'world':
+        return country == region
+    return True
+
+
+# The constants of fdlibm's e_pow.c.
+(L1, L2, L3, L4, L5, L6) = (5.99999999999994648725e-01, 4.28571428578550184252e-01, 3.33333329818377432918e-01,
+                            2.72728123808534006489e-01, 2.30660745775561754067e-01, 2.06975017800338417784e-01)
+(P1, P2, P3, P4, P5) = (1.66666666666666019037e-01, -2.77777777770155933842e-03, 6.61375632143793436117e-05,
+                        -1.65339022054652515390e-06, 4.13813679705723846039e-08)
+(lg2, lg2_h, lg2_l) = (6.93147180559945286227e-01, 6.93147182464599609375e-01, -1.90465429995776804525e-09)
+(cp, cp_h, cp_l) = (9.61796693925975554329e-01, 9.61796700954437255859e-01, -7.02846165095275826516e-09)
+(dp_h, dp_l) = (numpy.array([0.0, 5.84962487220764160156e-01]), numpy.array([0.0, 1.35003920212974897128e-08]))
+
+
+def highWord(x):
+    return x.view(numpy.int64) >> 32
+
+
+def clearLowWord(x):
+    return (numpy.ascontiguousarray(x).view(numpy.int64) & ~0xffffffff).view(numpy.float64)
+
+
+def fromHighWord(high):
+    return (high.astype(numpy.int64) << 32).view(numpy.float64)
+
+
+def jsPow(x, y):
+    """x ** y as the site's Math.pow computes it, for x >= 1 and 0 < y <= 1 (arrays of them).
+
+    V8 computes Math.pow with its own port of fdlibm's __ieee754_pow,
+    which now and then differs from the C library's pow (and so from
+    NumPy's) in the last bit, and so can change a department's place.
+    This is V8's version, as array operations, for the arguments
+    scores have.
+    """
+    (x, y) = (numpy.ascontiguousarray(a, dtype=numpy.float64) for a in numpy.broadcast_arrays(x, y))
+    if (x < 1.0).any() or (y <= 0.0).any() or (y > 1.0).any():
+        raise ValueError('jsPow needs x >= 1 and 0 < y <= 1')
+    # log2(x) = n + log2(ax), 1 <= ax < 2, as t1 + t2.
+    ix = highWord(x)
+    n = (ix >> 20) - 0x3ff
+    j = ix & 0x000fffff
+    ix = j | 0x3ff00000
+    k = (j > 0x3988E).astype(numpy.int64)
+    up = j >= 0xBB67A
+    k[up] = 0
+    n[up] += 1
+    ix[up] -= 0x00100000
+    ax = ((ix << 32) | (x.view(numpy.int64) & 0xffffffff)).view(numpy.float64)
+    bp = 1.0 + 0.5 * k
+    u = ax - bp
+    v = 1.0 / (ax + bp)
+    ss = u * v
+    s_h = clearLowWord(ss)
+    t_h = fromHighWord(((ix >> 1) | 0x20000000) + 0x00080000 + (k << 18))
+    t_l = ax - (t_h - bp)
+    s_l = v * ((u - s_h * t_h) - s_h * t_l)
+    s2 = ss * ss
+    r = s2 * s2 * (L1 + s2 * (L2 + s2 * (L3 + s2 * (L4 + s2 * (L5 + s2 * L6)))))
+    r += s_l * (s_h + ss)
+    s2 = s_h * s_h
+    t_h = clearLowWord(3.0 + s2 + r)
+    t_l = r - ((t_h - 3.0) - s2)
+    u = s_h * t_h
+    v = s_l * t_h + t_l * ss
+    p_h = clearLowWord(u + v)
+    p_l = v - (p_h - u)
+    z_h = cp_h * p_h
+    z_l = cp_l * p_h + p_l * cp + dp_l[k]
+    t = n.astype(numpy.float64)
+    t1 = clearLowWord(((z_h + z_l) + dp_h[k]) + t)
+    t2 = z_l - (((t1 - t) - dp_h[k]) - z_h)
+    # y * log2(x) = p_h + p_l, as n + (p_h + p_l) with the latter at most 1/2.
+    y1 = clearLowWord(y)
+    p_l = (y - y1) * t1 + y * t2
+    p_h = y1 * t1
+    i = highWord(p_l + p_h)
+    big = i > 0x3fe00000
+    k = numpy.where(big, (i >> 20) - 0x3ff, 0)
+    n = i + (0x00100000 >> (k + 1))
+    k = (n >> 20) - 0x3ff
+    p_h = numpy.where(big, p_h - fromHighWord(n & ~(0x000fffff >> k)), p_h)
+    n = numpy.where(big, ((n & 0x000fffff) | 0x00100000) >> (20 - k), 0)
+    # 2 ** (p_h + p_l).
+    t = clearLowWord(p_l + p_h)
+    u = t * lg2_h
+    v = (p_l - (t - p_h)) * lg2 + t * lg2_l
+    z = u + v
+    w = v - (z - u)
+    t = z * z
+    t1 = z - t * (P1 + t * (P2 + t * (P3 + t * (P4 + t * P5))))
+    # Not fdlibm's (z * t1) / (t1 - 2.0) - (w + z * w): V8 divides by the difference.
+    r = (z * t1) / ((t1 - 2.0) - (w + z * w))
+    z = numpy.ascontiguousarray(1.0 - (r - z))
+    z = (z.view(numpy.int64) + (n << 52)).view(numpy.float64)
+    # fdlibm's special cases.
+    z = numpy.where(y == 0.5, numpy.sqrt(x), z)
+    return numpy.where((y == 1.0) | (x == 1.0), x, z)
+
+
+def bits(masks, width):
+    """The bit masks as a matrix of booleans, one row per mask."""
+    return (numpy.asarray(masks, dtype=numpy.int64)[:, numpy.newaxis] >> numpy.arange(width)) & 1 == 1
+
+
+def competitionRanks(score, ranked):
+    """The ranks of the ranked departments in each row of score (0 for the others), as rank() gives them."""
+    (rows, columns) = score.shape
+    # By score and then name (institutions are in order of name), the departments not ranked last.
+    order = numpy.argsort(numpy.where(ranked, -score, numpy.inf), axis=1, kind='mergesort')
+    v = numpy.floor(10.0 * numpy.take_along_axis(score, order, axis=1) + 0.5) / 10.0
+    # A rank starts wherever the rounded score changes.
+    changes = numpy.ones((rows, columns), dtype=bool)
+    changes[:, 1:] = v[:, 1:] != v[:, :-1]
+    sortedRanks = numpy.maximum.accumulate(numpy.where(changes, numpy.arange(columns), 0), axis=1) + 1
+    sortedRanks[~numpy.take_along_axis(ranked, order, axis=1)] = 0
+    ranks = numpy.empty((rows, columns), dtype=numpy.int32)
+    numpy.put_along_axis(ranks, order, sortedRanks, axis=1)
+    return ranks
+
+
+class Rankings(object):
+    """The rows of generated-author-info.csv, as arrays, ready to be ranked."""
+
+    def __init__(self, authorInfo='generated-author-info.csv', aliases='dblp-aliases.csv',
+                 countryInfo='country-info.csv', rules=rules):
+        self.aliases = readPairs(aliases, 'alias', 'name')
+        self.countryInfo = readPairs(countryInfo, 'institution', 'region')
+        # Subarea -> area, as the site's parentMap.
+        parents = dict((v.subarea, v.area) for v in rules.lookup.values() if v.subarea)
+        # Areas the site does not offer have no checkbox, and always
+        # count (but are not in any score); they all go in one column.
+        areaIndex = dict((a, i) for (i, a) in enumerate(areas))
+        other = len(areas)
+        (names, depts, checked, summed, years, adjusted) = ([], [], [], [], [], [])
+        with open(authorInfo) as f:
+            for row in csv.DictReader(f):
+                name = unicode(row['name'], 'utf-8')
+                names.append(self.aliases.get(name, name))
+                depts.append(unicode(row['dept'], 'utf-8'))
+                checked.append(areaIndex.get(row['area'], other))
+                summed.append(areaIndex.get(parents.get(row['area'], row['area']), other))
+                years.append(int(row['year']))
+                adjusted.append(float(row['adjustedcount']))
+        self.institutions = sorted(set(depts))
+        institutionIndex = dict((d, i) for (i, d) in enumerate(self.institutions))
+        authorIndex = {}
+        self.rowInstitution = numpy.array([institutionIndex[d] for d in depts], dtype=numpy.int32)
+        self.rowAuthor = numpy.array([authorIndex.setdefault(n, len(authorIndex)) for n in names], dtype=numpy.int32)
+        # The area whose checkbox decides if a row counts, and the one it counts in.
+        self.rowChecked = numpy.array(checked, dtype=numpy.int32)
+        self.rowArea = numpy.array(summed, dtype=numpy.int32)
+        self.rowYear = numpy.array(years, dtype=numpy.int32)
+        self.rowAdjusted = numpy.array(adjusted, dtype=numpy.float64)
+        self.country = [self.countryInfo.get(d) for d in self.institutions]
+
+    def regionMask(self, region):
+        """A mask of the institutions in region."""
+        return numpy.array([inRegion(region, c) for c in self.country], dtype=bool)
+
+    def selection(self, selected):
+        """The area indexes of selected (areas), in the site's order."""
+        unknown = set(selected) - set(areas)
+        if unknown:
+            raise ValueError('unknown areas: ' + ', '.join(sorted(unknown)))
+        return [i for (i, a) in enumerate(areas) if a in selected]
+
+    def rows(self, selected, startyear, endyear, region):
+        """The indexes of the rows that count."""
+        weights = numpy.zeros(len(areas) + 1, dtype=bool)
+        weights[self.selection(selected)] = True
+        weights[len(areas)] = True
+        mask = (self.rowYear >= startyear) & (self.rowYear <= endyear) & weights[self.rowChecked]
+        mask &= self.regionMask(region)[self.rowInstitution]
+        return numpy.flatnonzero(mask)
+
+    def adjustedCounts(self, rows):
+        """The adjusted papers of the rows, institutions x areas (and a last column for the other areas)."""
+        counts = numpy.zeros((len(self.institutions), len(areas) + 1))
+        # Unbuffered, so each sum is added up in the order of the rows.
+        numpy.add.at(counts, (self.rowInstitution[rows], self.rowArea[rows]), self.rowAdjusted[rows])
+        return counts
+
+    def facultyCounts(self, rows):
+        """How many faculty each institution has among the rows, each counted once, where they first turn up."""
+        (_, first) = numpy.unique(self.rowAuthor[rows], return_index=True)
+        return numpy.bincount(self.rowInstitution[rows[first]], minlength=len(self.institutions))
+
+    def scores(self, counts, selected):
+        """The geometric mean of the adjusted papers + 1 in the selected areas of each institution."""
+        columns = self.selection(selected)
+        score = numpy.ones(len(self.institutions))
+        for a in columns:
+            score *= counts[:, a] + 1.0
+        return jsPow(score, 1.0 / len(columns))
+
+    def stats(self, selected=areas, startyear=startyear, endyear=endyear, region='world'):
+        """The score and faculty of each institution; institutions without faculty there are not ranked."""
+        rows = self.rows(selected, startyear, endyear, region)
+        return (self.scores(self.adjustedCounts(rows), selected), self.facultyCounts(rows))
+
+    def rank(self, selected=areas, startyear=startyear, endyear=endyear, region='world', top=None):
+        """The ranked departments as (rank, institution, score, faculty), best first.
+
+        Like the site, departments are sorted by score and then name,
+        and those whose scores round to the same tenth share a rank;
+        with top, the list stops after that many (and any tied with
+        the last).
+        """
+        (score, faculty) = self.stats(selected, startyear, endyear, region)
+        order = sorted(numpy.flatnonzero(faculty > 0), key=lambda i: (-score[i], self.institutions[i]))
+        ranked = []
+        (rank, ties, last) = (0, 1, None)
+        for (n, i) in enumerate(order):
+            # Math.round(10 * score) / 10.
+            v = numpy.floor(10.0 * score[i] + 0.5) / 10.0
+            if (top is not None and n >= top and v != last) or v == 0.0:
+                break
+            if v != last:
+                (rank, ties) = (rank + ties, 0)
+            ranked.append((rank, self.institutions[i], float(score[i]), int(faculty[i])))
+            ties += 1
+            last = v
+        return ranked
+
+    def windowCounts(self, startyear, endyear):
+        """The adjusted papers of every institution in every area from startyear to endyear.
+
+        For a chosen area, these are the sums scores() is given for
+        any choice of areas that includes it: the rows a choice leaves
+        out are those of the areas not chosen.
+        """
+        return self.adjustedCounts(numpy.flatnonzero((self.rowYear >= startyear) & (self.rowYear <= endyear)))
+
+    def facultyRuns(self, startyear, endyear, region):
+        """Where each faculty member counts, for any choice of areas, as (need, block, institution, faculty).
+
+        A faculty member counts in the department of their first row
+        that counts, and a row counts if its area is chosen (or is not
+        one the site offers). So their rows, in order, fall into runs,
+        each in one department; they count in the department of the
+        first run with an area chosen: one whose areas (need) include
+        a chosen one when those of the runs before it (block) do not.
+        Returns the distinct runs, as bit masks of areas (bit
+        len(areas) for the other areas), sorted by institution, with
+        how many faculty have each.
+        """
+        mask = (self.rowYear >= startyear) & (self.rowYear <= endyear) & self.regionMask(region)[self.rowInstitution]
+        rows = numpy.flatnonzero(mask)
+        # The first row of each faculty member in each area, by faculty member and then in row order.
+        (_, first) = numpy.unique(self.rowAuthor[rows].astype(numpy.int64) * (len(areas) + 1) + self.rowChecked[rows],
+                                  return_index=True)
+        first = rows[numpy.sort(first)]
+        first = first[numpy.argsort(self.rowAuthor[first], kind='mergesort')]
+        runs = {}
+        (author, dept, need, block) = (None, None, 0, 0)
+        for (a, c, d) in zip(self.rowAuthor[first].tolist(), self.rowChecked[first].tolist(),
+                             self.rowInstitution[first].tolist()):
+            if a != author or d != dept:
+                if author is not None:
+                    runs[(dept, need, block)] = runs.get((dept, need, block), 0) + 1
+                block = block | need if a == author else 0
+                (author, dept, need) = (a, d, 0)
+            need |= 1 << c
+        if author is not None:
+            runs[(dept, need, block)] = runs.get((dept, need, block), 0) + 1
+        keys = sorted(runs)
+        return (numpy.array([k[1] for k in keys], dtype=numpy.int64), numpy.array([k[2] for k in keys], dtype=numpy.int64),
+                numpy.array([k[0] for k in keys], dtype=numpy.int32), numpy.array([runs[k] for k in keys]))
+
+    def batchScores(self, counts, weights):
+        """The score of each institution (columns) for each row of weights (selections x areas).
+
+        Rows of 0s and 1s are choices of areas, scored exactly as
+        scores() (and the site) would score them; other weights give
+        the weighted geometric mean of the adjusted papers + 1.
+        """
+        if (weights < 0).any() or not (weights > 0).any(axis=1).all():
+            raise ValueError('weights must not be negative, and each row needs an area')
+        if ((weights == 0) | (weights == 1)).all():
+            score = numpy.ones((len(weights), len(self.institutions)))
+            # Multiplying by 1 for the areas not chosen changes nothing.
+            for a in xrange(len(areas)):
+                score *= numpy.where(weights[:, a, numpy.newaxis] == 1, counts[:, a] + 1.0, 1.0)
+            return jsPow(score, 1.0 / weights.sum(axis=1)[:, numpy.newaxis])
+        logs = numpy.log(counts[:, :len(areas)] + 1.0)
+        return numpy.exp(numpy.dot(weights, logs.T) / weights.sum(axis=1)[:, numpy.newaxis])
+
+    def batch(self, weights, startyears=startyear, endyears=endyear, regions='world', chunk=1024):
+        """Ranks departments for every row of weights; generates (rows, scores, ranks, faculty) a chunk of rows at a time.
+
+        weights is selections x areas (in the order of areas): a row
+        of 0s and 1s is a choice of areas, as ticked on the site. The
+        years and regions are one for all rows, or one per row. Each
+        chunk is the indexes of up to chunk rows (with the same years
+        and region) and, for each of those rows and each institution,
+        its score, rank (0 if it is not ranked) and faculty; for a
+        choice of areas, they are what stats() and rank() give.
+        """
+        weights = numpy.asarray(weights, dtype=numpy.float64)
+        if weights.ndim != 2 or weights.shape[1] != len(areas):
+            raise ValueError('weights must have a column for each of %d areas' % len(areas))
+        n = len(weights)
+        (startyears, endyears) = (numpy.broadcast_to(startyears, (n,)), numpy.broadcast_to(endyears, (n,)))
+        regions = [regions] * n if isinstance(regions, basestring) else list(regions)
+        groups = {}
+        for (i, key) in enumerate(zip(startyears.tolist(), endyears.tolist(), regions)):
+            groups.setdefault(key, []).append(i)
+        counts = {}
+        # The areas whose rows count: the chosen ones, and the others.
+        chosen = numpy.hstack([weights > 0, numpy.ones((n, 1), dtype=bool)]).astype(numpy.float32)
+        for ((start, end, region), rows) in sorted(groups.iteritems()):
+            if (start, end) not in counts:
+                counts[(start, end)] = self.windowCounts(start, end)
+            inRegion = self.regionMask(region)
+            (need, block, dept, faculty) = self.facultyRuns(start, end, region)
+            (need, block) = (bits(need, len(areas) + 1).astype(numpy.float32), bits(block, len(areas) + 1).astype(numpy.float32))
+            # Where each institution's runs start.
+            (depts, starts) = numpy.unique(dept, return_index=True)
+            for i in xrange(0, len(rows), chunk):
+                part = numpy.array(rows[i:i + chunk])
+                score = self.batchScores(counts[(start, end)], weights[part])
+                score[:, ~inRegion] = 1.0
+                facultyCounts = numpy.zeros(score.shape, dtype=numpy.int64)
+                if len(dept):
+                    c = chosen[part]
+                    counted = (numpy.dot(c, need.T) > 0) & (numpy.dot(c, block.T) == 0)
+                    facultyCounts[:, depts] = numpy.add.reduceat(counted * faculty, starts, axis=1)
+                yield (part, score, competitionRanks(score, facultyCounts > 0), facultyCounts)
+
+
+def writeBatch(rankings, dirname, weights, startyears=startyear, endyears=endyear, regions='world', chunk=1024):
+    """Ranks departments for every row of weights (see Rankings.batch), writing the results to dirname as they come.
+
+    The scores, ranks and faculty are selections x institutions
+    arrays in scores.npy, ranks.npy and faculty.npy (for numpy.load,
+    with mmap_mode='r' for large batches); the weights are in
+    weights.npy, and the years and region of each row, the
+    institutions and the areas in batch.json, which is written last.
+    """
+    if not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    weights = numpy.asarray(weights, dtype=numpy.float64)
+    (n, m) = (len(weights), len(rankings.institutions))
+    numpy.save(os.path.join(dirname, 'weights.npy'), weights)
+    outputs = [numpy.lib.format.open_memmap(os.path.join(dirname, name + '.npy'), mode='w+', dtype=dtype, shape=(n, m))
+               for (name, dtype) in (('scores', numpy.float64), ('ranks', numpy.int32), ('faculty', numpy.int32))]
+    for result in rankings.batch(weights, startyears, endyears, regions, chunk):
+        for (output, values) in zip(outputs, result[1:]):
+            output[result[0]] = values
+    for output in outputs:
+        output.flush()
+    del outputs
+    regions = [regions] * n if isinstance(regions, basestring) else list(regions)
+    with open(os.path.join(dirname, 'batch.json'), 'w') as f:
+        json.dump({'areas': areas, 'institutions': rankings.institutions,
+                   'startyear': numpy.broadcast_to(startyears, (n,)).tolist(),
+                   'endyear': numpy.broadcast_to(endyears, (n,)).tolist(), 'region': regions},
+                  f, indent=2, separators=(',', ': '), sort_keys=True)
+        f.write('\n')
@@ -0,0 +1,64 @@
+"""Paper counts and adjusted counts by (author, category, year), in typed arrays.
+
+The sinks used to keep these in two dictionaries keyed by (author,
+area, subarea, year) tuples: each paper cost two lookups and two
+stores per faculty author, each score a tuple, two floats and an entry
+in each dictionary, and writing them out meant sorting the tuples.
+
+A ScoreTable gives each (author, category, year) that has a paper (a
+category is whatever the sink splits authors' papers by, such as an
+(area, subarea) pair) a slot in one array of doubles, holding its
+count and adjusted count side by side. The slot is found by a single
+integer, (author * categories + category) * yearSpan + year, which
+also sorts in (author, category, year) order, so items() only sorts
+integers. A full author x category x year array would be simpler
+still, but most of it would be empty: each faculty member publishes
+in a few areas, in a few of the years.
+
+The sums are added up in the same order as the dictionaries added
+them, so they are the same floats.
+"""
+from array import array
+
+# Years are 0 <= year < yearSpan.
+yearSpan = 4096
+
+emptyScore = array('d', [0.0, 0.0])
+
+
+class ScoreTable(object):
+    """Counts and adjusted counts of authors (integer ids) in the given categories, by year."""
+
+    def __init__(self, categories):
+        self.categories = sorted(categories)
+        self.categoryIndex = dict((c, i) for (i, c) in enumerate(self.categories))
+        # Key -> slot.
+        self.slots = {}
+        # The count of slot s is scores[2 * s], and its adjusted count
+        # scores[2 * s + 1].
+        self.scores = array('d')
+
+    def add(self, author, category, year, credit):
+        """Counts a paper of author's in category and year, with an adjusted credit."""
+        if not 0 <= year < yearSpan:
+            raise ValueError('year %d out of range' % year)
+        key = (author * len(self.categories) + self.categoryIndex[category]) * yearSpan + year
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = self.slots[key] = len(self.slots)
+            self.scores.extend(emptyScore)
+        scores = self.scores
+        scores[2 * slot] += 1.0
+        scores[2 * slot + 1] += credit
+
+    def __len__(self):
+        return len(self.slots)
+
+    def items(self):
+        """Generates (author, category, year, count, adjusted count) for every score, in that order."""
+        (n, categories, slots, scores) = (len(self.categories), self.categories, self.slots, self.scores)
+        for key in sorted(slots):
+            slot = slots[key]
+            (row, year) = divmod(key, yearSpan)
+            (author, c) = divmod(row, n)
+            yield (author, categories[c], year, scores[2 * slot], scores[2 * slot + 1])
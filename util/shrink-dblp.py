@@ -0,0 +1,66 @@
+# Writes a gzipped copy of DBLP that keeps only the papers in the
+# venues of venues.csv (see venuerules.py), in a single streaming pass.
+# The copy is an indexed dump (see dblpindex.py).
+#
+# usage: python util/shrink-dblp.py [dblp.xml.gz] [dblp-shrunk.xml.gz] [--level N]
+import argparse
+from csrankings import confdict
+from dblpindex import IndexWriter
+from dblpmetrics import Metrics
+from dblpscan import Prefilter, chunks, chunkSize, openDBLP, parsePieces, splitRecords
+
+# The kinds of records the rankings count.
+keptTags = ('<inproceedings', '<article')
+
+parser = argparse.ArgumentParser(description='Keep only the DBLP papers in the venues the rankings count.')
+parser.add_argument('input', nargs='?', default='dblp.xml.gz', help='DBLP dump to read (default: dblp.xml.gz)')
+parser.add_argument('output', nargs='?', default='dblp-shrunk.xml.gz', help='gzipped dump to write (default: dblp-shrunk.xml.gz)')
+parser.add_argument('--level', type=int, default=6, choices=range(1, 10), metavar='N', help='gzip compression level, 1-9 (default: 6)')
+parser.add_argument('--profile', nargs='?', const='profile.json', metavar='FILE', help='time the phases of the run and write a report to FILE (default: profile.json)')
+parser.add_argument('--profile-interval', type=int, default=10, metavar='S', help='with --profile, print a status line every S seconds (default: 10, 0 for never)')
+args = parser.parse_args()
+metrics = Metrics(args.profile_interval) if args.profile else None
+
+# Keep the dump's own declaration and doctype.
+with openDBLP(args.input) as f:
+    head = f.read(65536)
+header = head[:head.index('>', head.index('<dblp')) + 1]
+
+seen = 0
+kept = 0
+with openDBLP(args.input) as f:
+    if metrics is not None:
+        f = metrics.reader(f)
+    (decl, pieces) = chunks(f, chunkSize)
+    pre = Prefilter([], decl)
+    venues = pre.encodeAll(confdict)
+    out = IndexWriter(args.output, header, args.level)
+    if metrics is not None:
+        metrics.instrument(out, 'add', 'output')
+        metrics.instrument(out, 'close', 'output')
+    for piece in pieces:
+        raws = splitRecords(piece)
+        seen += len(raws)
+        if metrics is not None:
+            metrics.count(len(raws))
+        # Parse the candidates, both to settle the ones the raw bytes
+        # could not decide and for the index.
+        candidates = (r for r in raws if r.startswith(keptTags) and pre.venueMatches(r, venues) is not False)
+        if metrics is not None:
+            candidates = metrics.iterate(candidates, 'prefilter')
+        raws = list(candidates)
+        if not raws:
+            continue
+        recs = parsePieces(decl, [''.join(raws)])
+        if metrics is not None:
+            recs = metrics.iterate(recs, 'parse')
+        for (raw, rec) in zip(raws, recs):
+            if rec.venue() in confdict:
+                kept += 1
+                out.add(raw, rec)
+    out.close()
+
+print "%d records read, %d kept." % (seen, kept)
+if metrics is not None:
+    metrics.stop()
+    metrics.save(args.profile, input=args.input, output=args.output, level=args.level, kept=kept)
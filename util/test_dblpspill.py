@@ -0,0 +1,90 @@
+# Tests of spilling articles.json to disk across a checkpoint and resume.
+#
+# usage: python -m unittest discover util
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from dblpcheckpoint import Checkpoint
+from dblpscan import Record
+from dblpsinks import AuthorInfoSink
+
+facultydict = {'Ann Author': 'Some University'}
+
+
+def paper(n):
+    rec = Record('inproceedings', 'conf/aaai/%d' % n)
+    rec.authors = [u'Ann Author']
+    rec.title = u'Paper %d' % n
+    rec.booktitle = 'AAAI'
+    rec.year = '2015'
+    rec.pages = '%d-%d' % (10 * n, 10 * n + 7)
+    return rec
+
+
+def runs(dirname):
+    return sorted(name for name in os.listdir(dirname) if name.startswith('run-'))
+
+
+class ResumeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        os.chdir(self.tmp)
+        with open('dump.xml', 'w') as f:
+            f.write('<dblp></dblp>\n')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp)
+
+    def resume(self, spillDir):
+        """Checkpoints after two papers, spills a third, then resumes and finishes."""
+        # A budget of a byte spills every paper as a run of its own.
+        sink = AuthorInfoSink(facultydict, memoryBudget=1, spillDir=spillDir)
+        sink.handle(paper(1))
+        sink.handle(paper(2))
+        checkpoint = Checkpoint('checkpoint', 'dump.xml', 'fingerprint')
+        checkpoint.save([sink], 2, ('byte', 0))
+        checkpoint.wait()
+        # The run after the checkpoint, as if the scan then died.
+        sink.handle(paper(3))
+        resumed = AuthorInfoSink(facultydict, memoryBudget=1, spillDir=spillDir)
+        self.assertEqual(checkpoint.load([resumed]), (('byte', 0), 2))
+        self.assertEqual(len(resumed.spilled.runs), 2)
+        resumed.handle(paper(3))
+        return resumed
+
+    def articles(self):
+        with open('articles.json') as f:
+            return [a['title'] for a in json.load(f)]
+
+    def testSharedDirectory(self):
+        os.mkdir('shared')
+        with open('shared/notes.txt', 'w') as f:
+            f.write('not a run\n')
+        with open('shared/run-notes', 'w') as f:
+            f.write('not a run either\n')
+        sink = self.resume('shared')
+        self.assertEqual(runs('shared'), ['run-000000', 'run-000001', 'run-000002', 'run-notes'])
+        sink.finish()
+        self.assertEqual(self.articles(), ['Paper 1', 'Paper 2', 'Paper 3'])
+        self.assertEqual(sorted(os.listdir('shared')), ['notes.txt', 'run-notes'])
+
+    def testEmptySharedDirectory(self):
+        # Made by the user, so kept even once empty.
+        os.mkdir('shared')
+        self.resume('shared').finish()
+        self.assertEqual(os.listdir('shared'), [])
+
+    def testOwnDirectory(self):
+        # As for checkpoint.spill, made by the sink.
+        self.resume('checkpoint.spill').finish()
+        self.assertEqual(self.articles(), ['Paper 1', 'Paper 2', 'Paper 3'])
+        self.assertFalse(os.path.exists('checkpoint.spill'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# Tests of parsing DBLP pages fields, and of counting papers by them.
+#
+# usage: python -m unittest discover util
+import unittest
+import pagerange
+from dblpscan import Record
+from dblpsinks import AuthorInfoSink
+from pagerange import parsePages
+
+
+class ParsePagesTest(unittest.TestCase):
+
+    def setUp(self):
+        pagerange.cache.clear()
+
+    def testRanges(self):
+        self.assertEqual(parsePages('10-17'), (10, 8))
+        self.assertEqual(parsePages('12:140-12:150'), (140, 11))
+
+    def testRomanNumerals(self):
+        self.assertEqual(parsePages('xii-xv'), (12, 4))
+        self.assertEqual(parsePages('XII-XV'), (12, 4))
+        self.assertEqual(parsePages('ix-xiv'), (9, 6))
+        self.assertEqual(parsePages('vii'), (7, 1))
+
+    def testSinglePages(self):
+        self.assertEqual(parsePages('17'), (17, 1))
+        self.assertEqual(parsePages('12:7'), (7, 1))
+        self.assertEqual(parsePages('e1234'), (1234, 1))
+
+    def testNoPages(self):
+        self.assertEqual(parsePages(''), (0, 0))
+        self.assertEqual(parsePages('to appear'), (0, 0))
+        self.assertEqual(parsePages(None), (0, 0))
+
+    def testLegacy(self):
+        # What the old regexes gave, which the counting rules use.
+        for pages in ('10-17', '12:140-12:150'):
+            self.assertEqual(parsePages(pages, legacy=True), parsePages(pages))
+        for pages in ('xii-xv', '17', '12:7', 'e1234', 'to appear'):
+            self.assertEqual(parsePages(pages, legacy=True), (0, 0))
+
+    def testCache(self):
+        self.assertEqual(parsePages('xii-xv', legacy=True), (0, 0))
+        self.assertEqual(parsePages('xii-xv'), (12, 4))
+        self.assertEqual(pagerange.cache.keys(), ['xii-xv'])
+
+
+class CountingTest(unittest.TestCase):
+    """The real page range does not change which papers count."""
+
+    def paper(self, pages, booktitle='AAAI'):
+        rec = Record('inproceedings', 'conf/aaai/1')
+        rec.authors = [u'Ann Author']
+        rec.title = u'A paper'
+        rec.booktitle = booktitle
+        rec.year = '2015'
+        rec.pages = pages
+        return AuthorInfoSink({'Ann Author': 'Some University'}).extract(rec)
+
+    def testRomanFrontMatter(self):
+        # Six pages, but front matter has never counted.
+        (confname, year, verdict, hits) = self.paper('ix-xiv')
+        self.assertEqual(verdict, 'pageCountThreshold')
+        self.assertEqual(hits, ())
+
+    def testSinglePage(self):
+        for pages in ('17', 'e1234'):
+            self.assertEqual(self.paper(pages)[2], 'pageCountThreshold')
+
+    def testLongEnough(self):
+        (confname, year, verdict, hits) = self.paper('10-17')
+        self.assertEqual(verdict, 'longEnough')
+        self.assertEqual(hits[0][7:9], (10, 8))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,34 +3,12 @@ import htmlentitydefs
 import csv
 import operator
 import re
+from pagerange import parsePages
 
 parser = ElementTree.XMLParser(attribute_defaults=True, load_dtd=True)
 
 # Papers must be at least 4 pages long to count.
 pageCountThreshold = 4
-# Match ordinary page numbers (as in 10-17).
-pageCounterNormal = re.compile('(\d+)-(\d+)')
-# Match page number in the form volume:page (as in 12:140-12:150).
-pageCounterColon = re.compile('[0-9]+:([1-9][0-9]*)-[0-9]+:([1-9][0-9]*)')
-
-def pagecount(input):
-    pageCounterMatcher1 = pageCounterNormal.match(input)
-    pageCounterMatcher2 = pageCounterColon.match(input)
-    start = 0
-    end = 0
-    count = 0
-    
-    if (not (pageCounterMatcher1 is None)):
-        start = int(pageCounterMatcher1.group(1))
-        end   = int(pageCounterMatcher1.group(2))
-        count = end-start+1
-    else:
-        if (not (pageCounterMatcher2 is None)):
-            start = int(pageCounterMatcher2.group(1))
-            end   = int(pageCounterMatcher2.group(2))
-            count = end-start+1
-    return count
-
 
 # Consider pubs in this range only.
 startyear = 2000
@@ -79,7 +57,7 @@ def parseDBLP():
                 pageCount = -1
                 for child in node:
                     if (child.tag == 'pages' and type(child.text) is str):
-                        pageCount = pagecount(child.text)
+                        pageCount = parsePages(child.text, legacy=True)[1]
 
                 if ((pageCount > 1) and (pageCount < pageCountThreshold)):
                     # Only skip papers with a very small paper count,
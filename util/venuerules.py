@@ -0,0 +1,279 @@
+"""The venues that count, and the rules deciding which of their papers do.
+
+Both are data at the top of the repository: venues.csv lists every
+name DBLP uses for a venue (its booktitle or journal) together with
+the venue's area and canonical name, and venue-rules.csv holds the
+per-venue special cases (subareas, the ISMB issues of Bioinformatics,
+the SIGGRAPH issues of TOG, short and non-research papers at ICSE and
+SIGMOD, ...). Adding a venue or a rule needs no code changes.
+
+VenueRules compiles both into one table, lookup, mapping each DBLP
+name to a Venue with its area, subarea, canonical name and the rules
+of its canonical venue, so that placing and checking a paper costs a
+couple of dictionary lookups: issues are precomputed as the strings
+DBLP uses, and excluded page ranges are sorted so that a paper is
+matched against them with a binary search.
+
+VenueRules.verdict() also says which rule decided whether a paper
+counts, so that the papers a venue gained or lost can be traced back to
+a rule without another pass over DBLP (regenerate-data.py
+--rule-counts).
+
+Every script shares the one compiled instance, rules.
+"""
+from bisect import bisect_right
+import csv
+import os
+import re
+
+here = os.path.dirname(os.path.abspath(__file__))
+venuesFile = os.path.join(here, '..', 'venues.csv')
+rulesFile = os.path.join(here, '..', 'venue-rules.csv')
+
+# Consider pubs in this range only.
+startyear = 1970
+endyear = 2269
+
+# Papers must be at least 6 pages long to count.
+pageCountThreshold = 6
+
+# The verdicts of VenueRules.verdict(): the rule that let a paper count,
+acceptingRules = frozenset([
+    'longEnough',          # at least pageCountThreshold pages
+    'noPages',             # DBLP gives no pages
+    'shortPapersCount',    # a short paper where short papers count
+])
+# or the one that kept it out.
+rejectingRules = frozenset([
+    'yearRange',           # outside startyear-endyear
+    'issue',               # not in an issue that counts
+    'firstExcludedPage',
+    'excludedPages',
+    'minPages',
+    'excludedURL',
+    'pageCountThreshold',  # too short
+])
+
+issueValue = re.compile(r'^(\w+)\((\w+)\)$')
+rangeValue = re.compile(r'^(\d+)-(\d+)$')
+
+
+class Venue(object):
+    """What one DBLP venue name stands for."""
+
+    __slots__ = ('name', 'area', 'canonical', 'default', 'subarea', 'rule')
+
+    def __init__(self, name, area, canonical, default):
+        self.name = name
+        self.area = area
+        self.canonical = canonical
+        # Whether the area is selected by default on the web page.
+        self.default = default
+        self.subarea = ""
+        # The VenueRule of the canonical venue, or None if it has none.
+        self.rule = None
+
+
+class YearRule(object):
+    """What a venue excludes in one year."""
+
+    __slots__ = ('issues', 'firstExcludedPage', 'rangeStarts', 'rangeEnds', 'shortPapersCount')
+
+    def __init__(self):
+        # The (volume, number) pairs whose papers count, or None for any.
+        self.issues = None
+        # Papers starting at or after this page do not count.
+        self.firstExcludedPage = None
+        # Papers lying within one of these page ranges do not count. The
+        # ranges are sorted by their first page, and rangeEnds holds the
+        # furthest last page of the ranges up to each one.
+        self.rangeStarts = []
+        self.rangeEnds = []
+        self.shortPapersCount = False
+
+    def addRange(self, first, last):
+        ranges = sorted(zip(self.rangeStarts, self.rangeEnds) + [(first, last)])
+        self.rangeStarts = []
+        self.rangeEnds = []
+        for (first, last) in ranges:
+            self.rangeStarts.append(first)
+            self.rangeEnds.append(max(last, self.rangeEnds[-1]) if self.rangeEnds else last)
+
+    def excludes(self, volume, number, startPage, pageCount):
+        """The rule excluding a paper this year, or None if none does."""
+        if self.issues is not None and (volume, number) not in self.issues:
+            return 'issue'
+        if self.firstExcludedPage is not None and startPage >= self.firstExcludedPage:
+            return 'firstExcludedPage'
+        if self.rangeStarts:
+            i = bisect_right(self.rangeStarts, startPage)
+            if i and startPage + pageCount - 1 <= self.rangeEnds[i - 1]:
+                return 'excludedPages'
+        return None
+
+
+class VenueRule(object):
+    """What a venue excludes, in every year and (in years) in particular ones."""
+
+    __slots__ = ('years', 'issuesOnly', 'minPages', 'excludedURL', 'shortPapersCount', 'shortPaperVolumes')
+
+    def __init__(self):
+        self.years = {}
+        # Only papers in the issues listed for their year count.
+        self.issuesOnly = False
+        self.minPages = None
+        # Papers whose URL contains this do not count.
+        self.excludedURL = None
+        self.shortPapersCount = False
+        # Short papers in these volumes (first, last) count.
+        self.shortPaperVolumes = None
+
+    def year(self, year):
+        return self.years.setdefault(year, YearRule())
+
+
+def readCSV(fname):
+    """The rows of a CSV file with a header, skipping lines that start with #."""
+    with open(fname) as f:
+        return list(csv.DictReader(line for line in f if not line.startswith('#')))
+
+
+class VenueRules(object):
+    """The venues of venues.csv and the rules of venue-rules.csv, compiled."""
+
+    def __init__(self, venuesFile=venuesFile, rulesFile=rulesFile):
+        self.venuesFile = venuesFile
+        self.rulesFile = rulesFile
+        self.startyear = startyear
+        self.endyear = endyear
+        self.pageCountThreshold = pageCountThreshold
+        # DBLP name -> Venue, in the order of venues.csv.
+        self.lookup = {}
+        self.names = []
+        for row in readCSV(venuesFile):
+            name = intern(row['alternate'])
+            if name in self.lookup:
+                raise ValueError('%s lists %s twice' % (venuesFile, name))
+            self.lookup[name] = Venue(name, intern(row['area']), intern(row['canonical']), row['default'] == 'True')
+            self.names.append(name)
+        # Canonical venue -> VenueRule (or subarea).
+        self.rules = {}
+        subareas = {}
+        for (n, row) in enumerate(readCSV(rulesFile)):
+            try:
+                self.addRule(subareas, row['venue'], int(row['year']) if row['year'] else None, row['rule'], row['value'])
+            except ValueError as e:
+                raise ValueError('%s, rule %d (%s): %s' % (rulesFile, n + 1, row['venue'], e))
+        for v in self.lookup.values():
+            v.subarea = subareas.get(v.canonical, "")
+            v.rule = self.rules.get(v.canonical)
+
+    def addRule(self, subareas, venue, year, rule, value):
+        if rule == 'subarea':
+            subareas[venue] = intern(value)
+            return
+        r = self.rules.setdefault(venue, VenueRule())
+        if rule == 'issue':
+            m = issueValue.match(value)
+            if not m or year is None:
+                raise ValueError('an issue needs a year and a value VOLUME(NUMBER)')
+            r.issuesOnly = True
+            y = r.year(year)
+            y.issues = (y.issues or frozenset()) | frozenset([m.groups()])
+        elif rule == 'firstExcludedPage':
+            if year is None:
+                raise ValueError('a first excluded page needs a year')
+            r.year(year).firstExcludedPage = int(value)
+        elif rule == 'excludedPages':
+            m = rangeValue.match(value)
+            if not m or year is None:
+                raise ValueError('excluded pages need a year and a value FIRST-LAST')
+            r.year(year).addRange(int(m.group(1)), int(m.group(2)))
+        elif rule == 'minPages':
+            r.minPages = int(value)
+        elif rule == 'excludedURL':
+            r.excludedURL = value
+        elif rule == 'shortPapersCount':
+            if year is None:
+                r.shortPapersCount = True
+            else:
+                r.year(year).shortPapersCount = True
+        elif rule == 'shortPaperVolumes':
+            m = rangeValue.match(value)
+            if not m:
+                raise ValueError('short paper volumes need a value FIRST-LAST')
+            r.shortPaperVolumes = (int(m.group(1)), int(m.group(2)))
+        else:
+            raise ValueError('unknown rule ' + rule)
+
+    def areas(self):
+        """A dictionary mapping each area to its DBLP venue names."""
+        d = {}
+        for name in self.names:
+            d.setdefault(self.lookup[name].area, []).append(name)
+        return d
+
+    def tooFewPages(self, confname, year, volume, pageCount):
+        """True iff a paper is too short to count (allowing for DBLP's known bad page counts).
+
+        Only skip papers with a very small page count: DBLP has real
+        papers with incorrect page counts, usually a truncated single
+        page, and -1 means no pages were found at all.
+        """
+        if pageCount == -1 or pageCount >= self.pageCountThreshold:
+            return False
+        venue = self.lookup.get(confname)
+        return venue is None or venue.rule is None or not self.shortPaperCounts(venue.rule, year, volume)
+
+    def shortPaperCounts(self, rule, year, volume):
+        if rule.shortPapersCount:
+            return True
+        if rule.shortPaperVolumes is not None:
+            try:
+                v = int(volume)
+            except (TypeError, ValueError):
+                v = None
+            if v is not None and rule.shortPaperVolumes[0] <= v <= rule.shortPaperVolumes[1]:
+                return True
+        r = rule.years.get(year)
+        return r is not None and r.shortPapersCount
+
+    def verdict(self, venue, year, volume, number, startPage, pageCount, url):
+        """The rule deciding whether this paper, in a Venue of lookup, counts (see acceptingRules and rejectingRules)."""
+        if year < self.startyear or year > self.endyear:
+            return 'yearRange'
+        rule = venue.rule
+        if rule is not None:
+            r = rule.years.get(year)
+            if r is not None:
+                excluded = r.excludes(volume, number, startPage, pageCount)
+                if excluded is not None:
+                    return excluded
+            if rule.issuesOnly and (r is None or r.issues is None):
+                return 'issue'
+            if rule.minPages is not None and pageCount < rule.minPages:
+                return 'minPages'
+            if rule.excludedURL is not None and url is not None and rule.excludedURL in url:
+                return 'excludedURL'
+        # Most venues have no rules of their own, and go straight here.
+        if pageCount >= self.pageCountThreshold:
+            return 'longEnough'
+        if pageCount == -1:
+            return 'noPages'
+        if rule is not None and self.shortPaperCounts(rule, year, volume):
+            return 'shortPapersCount'
+        return 'pageCountThreshold'
+
+    def counts(self, venue, year, volume, number, startPage, pageCount, url):
+        """Returns true iff this paper, in a Venue of lookup, will be included in the rankings."""
+        return self.verdict(venue, year, volume, number, startPage, pageCount, url) in acceptingRules
+
+    def countPaper(self, confname, year, volume, number, startPage, pageCount, url):
+        """Returns true iff this paper will be included in the rankings."""
+        venue = self.lookup.get(confname)
+        if venue is None:
+            return False
+        return self.counts(venue, year, volume, number, startPage, pageCount, url)
+
+
+rules = VenueRules()
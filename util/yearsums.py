@@ -0,0 +1,106 @@
+"""Papers over any span of years, from running totals (regenerate-data.py --year-sums).
+
+For each institution and area, and for each faculty member (under
+their canonical name, at an institution) and area they published in,
+datacube.writeYearSums() saves the papers and adjusted papers up to
+each year as running totals, starting from 0 before the first year.
+The papers from startyear to endyear are then the total at endyear
+less the total before startyear: two lookups and a subtraction for
+any span of years, for every institution and area at once.
+
+    sums = YearSums('generated-year-sums')
+    sums.adjusted(2008, 2018)               # institutions x areas
+    sums.facultyCounts(['ai', 'mlmining'], 2008, 2018)
+    for (start, end, adjusted) in sums.windows(10):
+        ...                                 # every ten-year span
+
+Areas include subareas, whose papers are also in their parent area's,
+so adding up a choice of areas should use one or the other.
+"""
+import json
+import numpy
+import os
+from datacube import yearSumsVersion
+
+
+class YearSums(object):
+    """The running totals saved in a directory, memory-mapped."""
+
+    def __init__(self, dirname='generated-year-sums'):
+        with open(os.path.join(dirname, 'sums.json')) as f:
+            meta = json.load(f)
+        if meta['version'] != yearSumsVersion:
+            raise ValueError(dirname + ' was written by an incompatible version; rebuild it.')
+        self.firstYear = meta['firstYear']
+        self.lastYear = meta['lastYear']
+        self.areas = meta['areas']
+        self.parents = meta['parents']
+        self.institutions = meta['institutions']
+        # (name, institution) of each faculty member.
+        self.authors = [tuple(a) for a in meta['authors']]
+        self.areaIndex = dict((a, i) for (i, a) in enumerate(self.areas))
+        self.institutionIndex = dict((d, i) for (i, d) in enumerate(self.institutions))
+
+        def load(name):
+            return numpy.load(os.path.join(dirname, name + '.npy'), mmap_mode='r')
+        # Institution x area x (year + 1).
+        self.institutionCounts = load('institutionCounts')
+        self.institutionAdjusted = load('institutionAdjusted')
+        # Row x (year + 1), where each row is one author's papers in one area.
+        self.authorCounts = load('authorCounts')
+        self.authorAdjusted = load('authorAdjusted')
+        rows = load('authorRows')
+        (self.rowAuthor, self.rowArea) = (numpy.array(rows[:, 0]), numpy.array(rows[:, 1]))
+        self.authorInstitution = numpy.array([self.institutionIndex[d] for (_, d) in self.authors], dtype=numpy.int32)
+
+    def span(self, startyear, endyear):
+        """The indexes of the totals before startyear and at endyear (within the years there are)."""
+        start = min(max(startyear, self.firstYear), self.lastYear + 1) - self.firstYear
+        end = min(max(endyear, self.firstYear - 1), self.lastYear) - self.firstYear + 1
+        return (start, max(start, end))
+
+    def areaMask(self, areas):
+        mask = numpy.zeros(len(self.areas), dtype=bool)
+        mask[[self.areaIndex[a] for a in areas]] = True
+        return mask
+
+    def adjusted(self, startyear, endyear):
+        """The adjusted papers of each institution (rows) in each area (columns) from startyear to endyear."""
+        (start, end) = self.span(startyear, endyear)
+        return self.institutionAdjusted[:, :, end] - self.institutionAdjusted[:, :, start]
+
+    def counts(self, startyear, endyear):
+        """The papers of each institution (rows) in each area (columns) from startyear to endyear."""
+        (start, end) = self.span(startyear, endyear)
+        return self.institutionCounts[:, :, end] - self.institutionCounts[:, :, start]
+
+    def authorPapers(self, startyear, endyear, adjusted=False):
+        """The papers (or adjusted papers) of each author row from startyear to endyear."""
+        totals = self.authorAdjusted if adjusted else self.authorCounts
+        (start, end) = self.span(startyear, endyear)
+        return totals[:, end] - totals[:, start]
+
+    def activeAuthors(self, areas, startyear, endyear):
+        """A mask of the authors with a paper in one of areas from startyear to endyear."""
+        rows = self.areaMask(areas)[self.rowArea] & (self.authorPapers(startyear, endyear) > 0)
+        active = numpy.zeros(len(self.authors), dtype=bool)
+        active[self.rowAuthor[rows]] = True
+        return active
+
+    def facultyCounts(self, areas, startyear, endyear):
+        """How many faculty of each institution have a paper in one of areas from startyear to endyear."""
+        active = self.activeAuthors(areas, startyear, endyear)
+        return numpy.bincount(self.authorInstitution[active], minlength=len(self.institutions))
+
+    def windows(self, width, startyear=None, endyear=None, adjusted=True):
+        """Generates (first year, last year, institutions x areas) for every span of width years from startyear to endyear."""
+        totals = self.institutionAdjusted if adjusted else self.institutionCounts
+        (start, end) = self.span(self.firstYear if startyear is None else startyear,
+                                 self.lastYear if endyear is None else endyear)
+        if end - start < width:
+            return
+        # Every span at once: institutions x areas x spans.
+        sums = totals[:, :, start + width:end + 1] - totals[:, :, start:end + 1 - width]
+        for i in xrange(sums.shape[2]):
+            first = self.firstYear + start + i
+            yield (first, first + width - 1, sums[:, :, i])